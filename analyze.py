@@ -11,15 +11,21 @@ import matplotlib.pyplot as plt
 portion_elites = 0.25
 regression_degree = 2
 
-run_data = Population.load_run_data(sys.argv[1])
+# Run logs are read one generation at a time; files saved by Population.save_run_data are loaded whole.
+if is_run_log(sys.argv[1]):
+    run_data = RunLogReader(sys.argv[1])
+    generation_lists = (record.fitnesses for record in run_data)
+else:
+    run_data = Population.load_run_data(sys.argv[1])
+    generation_lists = run_data
 
 generation_average_fitnesses = []
 generation_elite_average_fitnesses = []
 generation_best_fitnesses = []
 
-for generation_list in run_data:
+for generation_list in generation_lists:
 
-    generation_list.sort(reverse=True)
+    generation_list = sorted(generation_list, reverse=True)
 
     generation_average_fitnesses.append( sum(generation_list) / len(generation_list) )
 
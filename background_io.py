@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import queue
+import atexit
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from globals import *
+
+# Writes a file through a temporary file which then replaces it, so that the file is never seen half written.
+def write_file_atomically(filename, data):
+
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_filename, filename)
+
+# Runs I/O tasks in order on a background thread, so that the evolution loop does not wait for the disk. Tasks must
+# only use data which the caller does not change afterwards, such as bytes or copies of genomes, since they run while
+# the next generation is being evaluated.
+#
+# At most max_queue_size tasks wait at any time: submitting a task to a full queue blocks until the oldest one is done,
+# which bounds the memory held by pending writes. An exception raised by a task is raised again by the next call of
+# submit(), flush() or close(). Pending tasks are finished when the interpreter exits.
+class BackgroundWriter:
+
+    def __init__(self, max_queue_size=default_background_queue_size):
+
+        self.tasks = queue.Queue(maxsize=max_queue_size)
+        self.exception = None
+
+        self.thread = threading.Thread(target=self.run_tasks, name="BackgroundWriter", daemon=True)
+        self.thread.start()
+
+        atexit.register(self.close)
+
+    def run_tasks(self):
+
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                function, arguments = task
+                function(*arguments)
+            except BaseException as exception:
+                self.exception = exception
+            finally:
+                self.tasks.task_done()
+
+    def raise_exception(self):
+
+        if self.exception is not None:
+            exception = self.exception
+            self.exception = None
+            raise exception
+
+    def submit(self, function, *arguments):
+
+        self.raise_exception()
+        assert self.thread.is_alive(), "The BackgroundWriter is closed."
+
+        self.tasks.put((function, arguments))
+
+    def write_file(self, filename, data):
+
+        self.submit(write_file_atomically, filename, data)
+
+    # Waits until every submitted task is done.
+    def flush(self):
+
+        self.tasks.join()
+        self.raise_exception()
+
+    def close(self):
+
+        if self.thread.is_alive():
+            self.tasks.put(None)
+            self.thread.join()
+
+        atexit.unregister(self.close)
+        self.raise_exception()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# The BackgroundWriter shared by Populations which are not given their own.
+shared_background_writer = None
+
+def get_shared_background_writer():
+
+    global shared_background_writer
+    if shared_background_writer is None or not shared_background_writer.thread.is_alive():
+        shared_background_writer = BackgroundWriter()
+
+    return shared_background_writer
+
+def flush_shared_background_writer():
+
+    if shared_background_writer is not None:
+        shared_background_writer.flush()
@@ -0,0 +1,211 @@
+import os
+import sys
+import argparse
+import json
+import platform
+import tempfile
+from time import perf_counter
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from population import *
+
+# Benchmarks of the parts of the evolution loop, across population sizes and genome sizes. Every benchmark is seeded,
+# so it does the same work on every run, and reports the best time of several repeats. Results are printed as a table,
+# and can be written as JSON for tracking performance across versions:
+#
+#   python benchmark.py --output results.json
+#   python benchmark.py --quick
+
+benchmark_num_inputs = 4
+benchmark_num_outputs = 2
+
+# Samples of the parity of the inputs, used as the fitness function of the generation benchmark.
+benchmark_samples = [([(sample >> bit) & 1 for bit in range(benchmark_num_inputs)], bin(sample).count("1") % 2) for sample in range(2**benchmark_num_inputs)]
+
+def benchmark_fitness(neural_network):
+
+    fitness = len(benchmark_samples)
+    for inputs, target in benchmark_samples:
+        output = neural_network.activate(inputs)[0]
+        fitness -= 1 if output is None else (output - target) ** 2
+
+    return fitness
+
+# Restores the random number generator and the innovation_tracker, so that every repeat of a benchmark does the same
+# work: new genomes, species and innovations take the same identifiers and innovation numbers each time.
+def restore_state(seed_value, tracker_state):
+
+    seed(seed_value)
+    innovation_tracker.set_state(tracker_state)
+
+# The numbers a benchmark started from, recorded with its results.
+def tracker_summary(tracker_state):
+
+    return {"num_innovations" : len(tracker_state["innovations"]),
+            "next_innovation_number" : tracker_state["next_innovation_number"],
+            "next_genome_identifier" : tracker_state["next_genome_identifier"],
+            "next_species_identifier" : tracker_state["next_species_identifier"]}
+
+# Returns num_genomes genomes, each grown by genome_size random mutations, with random fitnesses. They are numbered
+# from a new innovation_tracker.
+def make_genomes(num_genomes, genome_size, seed_value):
+
+    restore_state(seed_value, InnovationTracker().get_state())
+
+    genomes = []
+    for i in range(num_genomes):
+        genome = Genome.default(num_inputs=benchmark_num_inputs, num_outputs=benchmark_num_outputs, max_num_hidden_nodes=genome_size, output_activation_function=sigmoid)
+        for j in range(genome_size):
+            genome.random_mutation()
+        genome.fitness = random()
+        genomes.append(genome)
+
+    return genomes
+
+# Runs setup() and then operation() on each of the items it returns, repeat times, and returns the best time.
+def best_time(setup, operation, repeat):
+
+    times = []
+    for i in range(repeat):
+        items = setup()
+        start = perf_counter()
+        for item in items:
+            operation(item)
+        times.append(perf_counter() - start)
+
+    return min(times), len(items)
+
+def genome_benchmarks(population_size, genome_size, repeat, seed_value):
+
+    genomes = make_genomes(population_size, genome_size, seed_value)
+    pairs = [(genomes[i], genomes[(i + 1) % len(genomes)]) for i in range(len(genomes))]
+    tracker_state = innovation_tracker.get_state()
+
+    def fresh_copies():
+        restore_state(seed_value, tracker_state)
+        return [genome.copy() for genome in genomes]
+
+    def compiled_networks():
+        return [FeedForwardNeuralNetwork(genome) for genome in fresh_copies()]
+
+    sample_inputs = [[random() for i in range(benchmark_num_inputs)] for j in range(population_size)]
+
+    def networks_and_inputs():
+        return list(zip(compiled_networks(), sample_inputs))
+
+    def seeded_pairs():
+        restore_state(seed_value, tracker_state)
+        return pairs
+
+    # Speciates the genomes from scratch, as misfits of a Population without species.
+    def misfits():
+        population = Population(num_inputs=benchmark_num_inputs, num_outputs=benchmark_num_outputs, population_size=population_size, output_stream_name="None")
+        population.genomes = []
+        population.species = []
+        population.misfits = list(genomes)
+        restore_state(seed_value, tracker_state)
+        return [population]
+
+    benchmarks = {
+        "random_mutation" : (fresh_copies, lambda genome : genome.random_mutation()),
+        "crossover"       : (seeded_pairs, lambda pair : Genome.crossover(*pair)),
+        "similarity"      : (seeded_pairs, lambda pair : Genome.similarity(*pair)),
+        "network_init"    : (fresh_copies, lambda genome : FeedForwardNeuralNetwork(genome)),
+        "activate"        : (networks_and_inputs, lambda network_and_inputs : network_and_inputs[0].activate(network_and_inputs[1])),
+        "set_species"     : (misfits, lambda population : population.set_species()),
+    }
+
+    num_nodes = sum(len(genome.nodes) for genome in genomes) / len(genomes)
+    num_edges = sum(len(genome.edges) for genome in genomes) / len(genomes)
+
+    results = []
+    for name, (setup, operation) in benchmarks.items():
+        seconds, num_operations = best_time(setup, operation, repeat)
+        if name == "set_species":
+            num_operations = population_size
+        results.append(result_entry(name, population_size, genome_size, num_operations, seconds, {"mean_num_nodes" : num_nodes, "mean_num_edges" : num_edges, "seed" : seed_value, "innovation_tracker" : tracker_summary(tracker_state)}))
+
+    return results
+
+# Times whole generations of a Population evolving on benchmark_fitness, after num_warmup_generations generations. The
+# Population is seeded, so it draws its random numbers and innovation numbers independently of the rest of the process.
+def generation_benchmark(population_size, num_generations, num_warmup_generations, repeat, seed_value):
+
+    times = []
+    for i in range(repeat):
+
+        population = Population(num_inputs=benchmark_num_inputs, num_outputs=benchmark_num_outputs, output_activation_function=sigmoid, population_size=population_size, output_stream_name="None", seed=seed_value)
+        population.run_skeleton(benchmark_fitness, num_generations=num_warmup_generations)
+        tracker_state = population.innovation_tracker_state
+
+        start = perf_counter()
+        population.run_skeleton(benchmark_fitness, num_generations=num_warmup_generations + num_generations)
+        population.flush()
+        times.append(perf_counter() - start)
+
+    return [result_entry("generation", population_size, None, num_generations, min(times), {"num_species" : population.num_species(), "seed" : seed_value, "innovation_tracker" : tracker_summary(tracker_state)})]
+
+def result_entry(name, population_size, genome_size, num_operations, seconds, details):
+
+    entry = {"benchmark" : name,
+             "population_size" : population_size,
+             "genome_size" : genome_size,
+             "operations" : num_operations,
+             "seconds" : seconds,
+             "operations_per_second" : num_operations / seconds if seconds > 0 else None}
+    entry.update(details)
+
+    return entry
+
+def run_benchmarks(population_sizes, genome_sizes, num_generations, repeat, seed_value):
+
+    results = []
+    for population_size in population_sizes:
+        for genome_size in genome_sizes:
+            results += genome_benchmarks(population_size, genome_size, repeat, seed_value)
+        results += generation_benchmark(population_size, num_generations, 3, repeat, seed_value)
+
+    return {"python" : platform.python_version(),
+            "platform" : platform.platform(),
+            "seed" : seed_value,
+            "repeat" : repeat,
+            "results" : results}
+
+def print_results(report, file=sys.stdout):
+
+    print("%-16s%12s%12s%12s%14s%16s" % ("Benchmark", "Population", "Genome", "Operations", "Seconds", "Operations/s"), file=file)
+    for entry in report["results"]:
+        print("%-16s%12s%12s%12s%14.6f%16.1f" % (entry["benchmark"], entry["population_size"], entry["genome_size"] if entry["genome_size"] is not None else "-", entry["operations"], entry["seconds"], entry["operations_per_second"] or 0), file=file)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmarks of the evolution loop.")
+    parser.add_argument("--population-sizes", type=int, nargs="+", default=[150, 1000])
+    parser.add_argument("--genome-sizes", type=int, nargs="+", default=[10, 100], help="number of random mutations applied to each genome")
+    parser.add_argument("--generations", type=int, default=5, help="number of generations timed by the generation benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="only the smallest population and genome sizes")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    arguments = parser.parse_args()
+
+    population_sizes = arguments.population_sizes[:1] if arguments.quick else arguments.population_sizes
+    genome_sizes = arguments.genome_sizes[:1] if arguments.quick else arguments.genome_sizes
+
+    # Champions saved during the generation benchmark go to a temporary directory.
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            report = run_benchmarks(population_sizes, genome_sizes, arguments.generations, arguments.repeat, arguments.seed)
+        finally:
+            os.chdir(working_directory)
+
+    print_results(report)
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=4)
@@ -0,0 +1,84 @@
+import os
+import sys
+from collections import OrderedDict
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from neural_network import *
+
+# A dictionary of at most max_size entries, which evicts the least recently used entry when full. It counts the hits
+# and misses of get().
+class LRUCache:
+
+    def __init__(self, max_size):
+
+        assert max_size > 0
+
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return value
+
+    def put(self, key, value):
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
+
+    def reset_counters(self):
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def __str__(self):
+
+        return "{} of {} entries, {} hits, {} misses".format(len(self.entries), self.max_size, self.hits, self.misses)
+
+# Caches the NetworkTopology of compiled neural networks by the structural fingerprint of their genomes. Genomes which
+# only differ from a cached one in their weights and biases, such as unchanged elites or children whose only mutation
+# perturbed a weight, get a network compiled from the cached topology without recomputing its layers or plan.
+class NetworkCache(LRUCache):
+
+    def get_neural_network(self, genome):
+
+        fingerprint = genome.structural_fingerprint()
+
+        topology = self.get(fingerprint)
+        if topology is None:
+            neural_network = FeedForwardNeuralNetwork(genome, compiled=True)
+            self.put(fingerprint, neural_network.topology)
+        else:
+            neural_network = FeedForwardNeuralNetwork(genome, topology=topology)
+
+        return neural_network
+
+# Caches the fitness of genomes by their content fingerprint, so that unchanged elites and duplicate genomes are not
+# evaluated again. This is only correct for deterministic evaluation functions.
+class FitnessCache(LRUCache):
+
+    pass
@@ -0,0 +1,115 @@
+import os
+import sys
+import pickle
+import re
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from population import *
+
+# Saves a Population every frequency generations to directory, keeping the latest retention checkpoints (or all of them
+# if retention is None). Each checkpoint is written to a temporary file which then replaces the checkpoint file, so an
+# interrupted write never leaves a truncated checkpoint behind.
+#
+# Besides the Population, a checkpoint holds the state of the innovation_tracker and of the random number generator, so
+# that a run resumed with restore() numbers its innovations, genomes and species as if it had never stopped.
+#
+# Checkpoints are pickled when they are taken, and written to disk by a BackgroundWriter (see background_io.py): the
+# given one, or the shared one if use_background_writer is set.
+class Checkpointer:
+
+    version = 1
+
+    def __init__(self, directory=".", frequency=default_checkpoint_frequency, retention=default_checkpoint_retention, prefix="checkpoint", background_writer=None):
+
+        assert frequency > 0
+        assert retention is None or retention > 0
+
+        self.directory = directory
+        self.frequency = frequency
+        self.retention = retention
+        self.prefix = prefix
+
+        self.background_writer = background_writer
+        if self.background_writer is None and use_background_writer:
+            self.background_writer = get_shared_background_writer()
+
+        self.filename_pattern = re.compile(re.escape(prefix) + r"_gen(\d+)\.checkpoint$")
+
+    # Called by Population.run after each generation.
+    def checkpoint(self, population):
+
+        if population.generation % self.frequency == 0:
+            self.save(population)
+            if self.background_writer is not None:
+                self.background_writer.submit(self.remove_old_checkpoints)
+            else:
+                self.remove_old_checkpoints()
+
+    def filename(self, generation):
+
+        return os.path.join(self.directory, "{}_gen{}.checkpoint".format(self.prefix, generation))
+
+    def save(self, population, filename=None):
+
+        if filename is None:
+            filename = self.filename(population.generation)
+
+        checkpoint = {"version"            : Checkpointer.version,
+                      "population"         : population,
+                      "innovation_tracker" : innovation_tracker.get_state(),
+                      "random_state"       : getstate()}
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+        data = pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.background_writer is not None:
+            self.background_writer.write_file(filename, data)
+        else:
+            write_file_atomically(filename, data)
+
+        return filename
+
+    # Returns the checkpoint files of this Checkpointer, sorted by generation.
+    def checkpoints(self):
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        checkpoints = []
+        for filename in os.listdir(self.directory):
+            match = self.filename_pattern.match(filename)
+            if match is not None:
+                checkpoints.append( (int(match.group(1)), os.path.join(self.directory, filename)) )
+
+        return [filename for generation, filename in sorted(checkpoints)]
+
+    def latest_checkpoint(self):
+
+        checkpoints = self.checkpoints()
+        return checkpoints[-1] if len(checkpoints) > 0 else None
+
+    def remove_old_checkpoints(self):
+
+        if self.retention is not None:
+            for filename in self.checkpoints()[:-self.retention]:
+                os.remove(filename)
+
+    # Loads the Population of a checkpoint, and restores the innovation_tracker and random number generator to their
+    # state when it was saved. Pending writes of the shared BackgroundWriter are finished first.
+    @classmethod
+    def restore(cls, filename):
+
+        flush_shared_background_writer()
+
+        with open(filename, "rb") as file:
+            checkpoint = pickle.load(file)
+
+        assert checkpoint["version"] == Checkpointer.version, "Unsupported checkpoint version {}.".format(checkpoint["version"])
+
+        innovation_tracker.set_state(checkpoint["innovation_tracker"])
+        setstate(checkpoint["random_state"])
+
+        return checkpoint["population"]
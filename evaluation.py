@@ -0,0 +1,271 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from neural_network import *
+
+# Evaluators are alternatives to evaluating each FeedForwardNeuralNetwork of a Population serially. They are passed to
+# Population.run or Population.run_skeleton, and their evaluate() function returns a list with the fitness of each
+# network, in the same order as the networks.
+
+# Evaluates genomes in a pool of worker processes. Only the compact Genome.encode() encoding is sent to the workers, which
+# build their own FeedForwardNeuralNetwork for each genome. Workers are started on the first evaluation and are reused
+# for every following generation, until close() is called. The evaluation function must be picklable (for example,
+# defined at the top level of a module), and chunk_size genomes are sent to a worker at a time.
+class ParallelEvaluator:
+
+    def __init__(self, num_workers=None, chunk_size=1):
+
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+
+        self.executor = None
+        self.evaluation_function = None
+
+    # Starts the worker processes, or restarts them if they were started for a different evaluation function.
+    def start(self, evaluation_function):
+
+        if self.executor is not None and self.evaluation_function is not evaluation_function:
+            self.close()
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=initialize_worker, initargs=(evaluation_function,))
+            self.evaluation_function = evaluation_function
+
+    def evaluate(self, neural_networks, evaluation_function):
+
+        self.start(evaluation_function)
+
+        encodings = [neural_network.genome.encode() for neural_network in neural_networks]
+        return list(self.executor.map(evaluate_encoded_genome, encodings, chunksize=self.chunk_size))
+
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+        self.executor = None
+        self.evaluation_function = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# The evaluation function of a worker process of a ParallelEvaluator.
+worker_evaluation_function = None
+
+def initialize_worker(evaluation_function):
+
+    global worker_evaluation_function
+    worker_evaluation_function = evaluation_function
+
+def evaluate_encoded_genome(encoding):
+
+    neural_network = FeedForwardNeuralNetwork( Genome.decode(encoding) )
+    return worker_evaluation_function(neural_network)
+
+# Evaluates networks in a pool of threads, for evaluation functions which spend most of their time waiting on blocking
+# I/O. Like the ParallelEvaluator, the threads are reused until close() is called.
+class ThreadedEvaluator:
+
+    def __init__(self, num_workers=None):
+
+        self.num_workers = num_workers
+        self.executor = None
+
+    def evaluate(self, neural_networks, evaluation_function):
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+
+        return list(self.executor.map(evaluation_function, neural_networks))
+
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+        self.executor = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# Evaluates networks with an asynchronous evaluation function, that is, a coroutine function taking a network. The whole
+# generation is evaluated concurrently, with at most max_concurrency evaluations in progress at any time. Fitnesses are
+# returned in the order of the networks, whatever the order in which the evaluations complete.
+#
+# evaluate() runs its own event loop, so it cannot be called from a thread which is already running one, such as in a
+# Jupyter notebook or an asynchronous application. There, either await evaluate_concurrently() directly, or run the
+# Population in another thread.
+class AsyncEvaluator:
+
+    def __init__(self, max_concurrency=64):
+
+        self.max_concurrency = max_concurrency
+
+    def evaluate(self, neural_networks, evaluation_function):
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.evaluate_concurrently(neural_networks, evaluation_function))
+
+        raise RuntimeError("AsyncEvaluator.evaluate() cannot be called from a running event loop. Await AsyncEvaluator.evaluate_concurrently() instead, or run the Population in another thread.")
+
+    async def evaluate_concurrently(self, neural_networks, evaluation_function):
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def evaluate_with_semaphore(neural_network):
+            async with semaphore:
+                return await evaluation_function(neural_network)
+
+        return await asyncio.gather(*[evaluate_with_semaphore(neural_network) for neural_network in neural_networks])
+
+# Evaluates every network of a generation against one shared batch of inputs in a handful of vectorized passes. All
+# compiled plans are packed into a single value matrix with one row per node of every network. Nodes are grouped by
+# their depth in their own network and by their function codes, and each group is evaluated at once with its
+# connections padded to the largest fan-in of the group.
+#
+# The evaluation function receives the outputs of the whole population as a (num_networks, num_samples, num_outputs)
+# array, with NaN for inactive output nodes, and returns the fitness of each network.
+class StackedEvaluator:
+
+    # Padding makes every group cost num_nodes * max_fan_in * num_samples values, so large groups are evaluated in
+    # blocks of at most max_block_size values.
+    def __init__(self, inputs, max_block_size=2**24):
+
+        self.inputs = numpy.asarray(inputs, dtype=float)
+        assert self.inputs.ndim == 2
+
+        self.num_samples = self.inputs.shape[0]
+        self.max_block_size = max_block_size
+
+    def evaluate(self, neural_networks, evaluation_function):
+
+        outputs = self.activate(neural_networks)
+        fitnesses = evaluation_function(outputs)
+
+        assert len(fitnesses) == len(neural_networks)
+        return [float(fitness) for fitness in fitnesses]
+
+    def activate(self, neural_networks):
+
+        num_inputs = self.inputs.shape[1]
+        num_outputs = neural_networks[0].num_outputs if len(neural_networks) > 0 else 0
+
+        # The first rows hold the inputs, followed by a row of ones which turns biases into ordinary connections.
+        ones_row = num_inputs
+        num_rows = num_inputs + 1
+
+        groups = {}
+        output_rows = []
+        for neural_network in neural_networks:
+
+            assert neural_network.num_inputs == num_inputs
+            assert neural_network.num_outputs == num_outputs
+
+            if neural_network.plan_size is None:
+                neural_network.compile()
+            assert neural_network.plan_is_valid
+
+            first_row = num_rows
+            num_rows += neural_network.plan_size
+
+            depths = []
+            for position, buffer, input_index, start, end, bias, aggregation_function, activation_function in neural_network.plan_steps:
+
+                connections = []
+                depth = 0
+
+                if input_index >= 0:
+                    connections.append([input_index, 1.0])
+
+                for connection in range(start, end):
+                    source = neural_network.plan_sources[connection]
+                    connections.append([first_row + source, neural_network.plan_weights[connection]])
+                    depth = max(depth, depths[source] + 1)
+
+                if bias is not None:
+                    connections.append([ones_row, bias])
+
+                depths.append(depth)
+
+                key = (depth, neural_network.plan_aggregation_codes[position], neural_network.plan_activation_codes[position])
+                groups.setdefault(key, []).append([first_row + position, connections])
+
+            output_rows.append([first_row + position if position >= 0 else -1 for position in neural_network.plan_output_positions])
+
+        values = numpy.empty((num_rows, self.num_samples))
+        values[:num_inputs] = self.inputs.T
+        values[ones_row] = 1
+
+        for key in sorted(groups):
+
+            depth, aggregation_code, activation_code = key
+            aggregation_function = aggregation_functions[aggregation_code]
+            activation_function = activation_functions[activation_code]
+
+            nodes = groups[key]
+            max_fan_in = max(len(connections) for row, connections in nodes)
+            block_length = max(1, self.max_block_size // (max_fan_in * max(1, self.num_samples)))
+
+            for block_start in range(0, len(nodes), block_length):
+
+                block = nodes[block_start:block_start + block_length]
+                self.activate_block(values, block, max_fan_in, ones_row, aggregation_function, activation_function)
+
+        outputs = numpy.full((len(neural_networks), self.num_samples, num_outputs), numpy.nan)
+        for network_index, rows in enumerate(output_rows):
+            for output_index, row in enumerate(rows):
+                if row >= 0:
+                    outputs[network_index, :, output_index] = values[row]
+
+        return outputs
+
+    # Evaluates a block of nodes that share their depth and functions. Padded connections read the row of ones with a
+    # weight of 0, and are masked out for the aggregation functions to which a 0 is not neutral.
+    @classmethod
+    def activate_block(cls, values, block, max_fan_in, ones_row, aggregation_function, activation_function):
+
+        num_nodes = len(block)
+        rows = numpy.empty(num_nodes, dtype=int)
+        sources = numpy.full((num_nodes, max_fan_in), ones_row, dtype=int)
+        weights = numpy.zeros((num_nodes, max_fan_in))
+        counts = numpy.empty(num_nodes, dtype=int)
+
+        for index, [row, connections] in enumerate(block):
+            rows[index] = row
+            counts[index] = len(connections)
+            for connection_index, [source, weight] in enumerate(connections):
+                sources[index, connection_index] = source
+                weights[index, connection_index] = weight
+
+        contributions = values[sources] * weights[:, :, None]
+
+        if aggregation_function is sum:
+            aggregation = numpy.sum(contributions, axis=1)
+        elif aggregation_function is average:
+            aggregation = numpy.sum(contributions, axis=1) / counts[:, None]
+        else:
+            mask = numpy.arange(max_fan_in)[None, :] < counts[:, None]
+            if aggregation_function is min:
+                aggregation = numpy.min(numpy.where(mask[:, :, None], contributions, numpy.inf), axis=1)
+            else:
+                aggregation = numpy.max(numpy.where(mask[:, :, None], contributions, -numpy.inf), axis=1)
+
+        values[rows] = vectorized_functions[activation_function](aggregation)
@@ -77,7 +77,88 @@ def tanh(x):
 aggregation_functions = [sum, min, max, average]
 activation_functions = [arctan, binary_step, identity, lelu, relu, sigmoid, softplus, step, tanh]
 
-function_names = {
+# Vectorized versions of the aggregation and activation functions, used by FeedForwardNeuralNetwork.activate_batch.
+# Aggregation functions reduce a (num_inputs, num_samples) matrix over its first axis. Activation functions are applied
+# elementwise.
+
+def vectorized_sum(inputs):
+
+    return numpy.sum(inputs, axis=0)
+
+def vectorized_min(inputs):
+
+    return numpy.min(inputs, axis=0)
+
+def vectorized_max(inputs):
+
+    return numpy.max(inputs, axis=0)
+
+def vectorized_average(inputs):
+
+    return numpy.sum(inputs, axis=0) / inputs.shape[0]
+
+def vectorized_arctan(x):
+
+    return numpy.arctan(x)
+
+def vectorized_binary_step(x):
+
+    return numpy.where(x >= 0, 1.0, 0.0)
+
+def vectorized_identity(x):
+
+    return x
+
+def vectorized_lelu(x):
+
+    leaky = 0.005
+    return numpy.where(x > 0.0, x, leaky * x)
+
+def vectorized_relu(x):
+
+    return numpy.where(x >= 0, x, 0.0)
+
+def vectorized_sigmoid(x):
+
+    x = numpy.maximum(x, -708)
+    return 1 / (1 + numpy.exp(-x))
+
+def vectorized_softplus(x):
+
+    x = numpy.minimum(x, 708)
+    return numpy.log(1 + (math.e ** x))
+
+def vectorized_step(x):
+
+    return numpy.where(x < 0.5, 0.0, 1.0)
+
+def vectorized_tanh(x):
+
+    x = numpy.maximum(-353, x)
+    return (2.0 / (1 + (math.e ** (-2 * x)))) - 1
+
+vectorized_functions = {
+    sum : vectorized_sum,
+    min : vectorized_min,
+    max : vectorized_max,
+    average : vectorized_average,
+    arctan : vectorized_arctan,
+    binary_step : vectorized_binary_step,
+    identity : vectorized_identity,
+    lelu : vectorized_lelu,
+    relu : vectorized_relu,
+    sigmoid : vectorized_sigmoid,
+    softplus : vectorized_softplus,
+    step : vectorized_step,
+    tanh : vectorized_tanh,
+}
+
+# Integer codes for functions, used by compiled neural networks in place of function objects.
+aggregation_function_codes = {function : code for code, function in enumerate(aggregation_functions)}
+activation_function_codes = {function : code for code, function in enumerate(activation_functions)}
+
+# Unique names of all functions, used to store genomes independently of the order of the lists above.
+full_function_names = {
     arctan : "arctan",
     average : "average",
     binary_step : "binary_step",
@@ -93,6 +174,9 @@ function_names = {
     tanh : "tanh",
 }
 
+functions_by_name = {name : function for function, name in full_function_names.items()}
+
+# Short names of all functions, for display.
 function_names = {
     arctan : "atan",
     average : "ave",
@@ -1,6 +1,7 @@
-from copy import deepcopy
 from random import *
+import random as random_module
 import pickle
+from time import perf_counter
 import os
 import sys
 
@@ -10,12 +11,21 @@ sys.path.append(file_dir)
 
 from functions import *
 from globals import *
+from telemetry import *
 
 # from visualize import draw_genome_full
 
+# Functions which draw random numbers take an optional rng, a random.Random such as those of random_streams.py, and draw
+# them from the global random number generator of the random module if it is None.
+
+# NodeGenes and EdgeGenes use __slots__ rather than a __dict__. Counting their attribute values, this takes an EdgeGene
+# from about 270 to 150 bytes and a NodeGene from about 180 to 130 bytes, so genomes take about a third less memory. They
+# are pickled as tuples of their attributes, and can also be unpickled from the dictionaries of older, unslotted genes.
 class NodeGene:
 
-    def __init__(self, identifier, aggregation_function=default_aggregation_function, bias=None, activation_function=default_activation_function, is_input_node=False, is_output_node=False, is_enabled=True):
+    __slots__ = ["identifier", "aggregation_function", "activation_function", "is_input_node", "is_output_node", "is_enabled", "bias"]
+
+    def __init__(self, identifier, aggregation_function=default_aggregation_function, bias=None, activation_function=default_activation_function, is_input_node=False, is_output_node=False, is_enabled=True, rng=None):
 
         self.identifier = identifier
         self.aggregation_function = aggregation_function
@@ -26,7 +36,7 @@ class NodeGene:
 
         self.bias = bias
         if self.bias is None and random_initial_bias and not(self.is_input_node or self.is_output_node):
-            self.bias = uniform(bias_min, bias_max)
+            self.bias = (rng or random_module).uniform(bias_min, bias_max)
 
     def sanity_check(self):
 
@@ -54,9 +64,37 @@ class NodeGene:
 
         return self.__str__()
 
+    # Returns a copy of the NodeGene, made by copying each of its attributes. They are all immutable, so the copy shares
+    # them with the original.
+    def copy(self):
+
+        node = NodeGene.__new__(NodeGene)
+        node.identifier = self.identifier
+        node.aggregation_function = self.aggregation_function
+        node.activation_function = self.activation_function
+        node.is_input_node = self.is_input_node
+        node.is_output_node = self.is_output_node
+        node.is_enabled = self.is_enabled
+        node.bias = self.bias
+        return node
+
+    def __getstate__(self):
+
+        return tuple(getattr(self, attribute) for attribute in NodeGene.__slots__)
+
+    def __setstate__(self, state):
+
+        if isinstance(state, dict):
+            state = [state[attribute] for attribute in NodeGene.__slots__]
+
+        for attribute, value in zip(NodeGene.__slots__, state):
+            setattr(self, attribute, value)
+
 class EdgeGene:
 
-    def __init__(self, input_node_identifier, output_node_identifier, identifier=None, innovation_number=None, weight=None, is_enabled=True):
+    __slots__ = ["identifier", "innovation_number", "input_node_identifier", "output_node_identifier", "weight", "is_enabled"]
+
+    def __init__(self, input_node_identifier, output_node_identifier, identifier=None, innovation_number=None, weight=None, is_enabled=True, rng=None):
 
         # These should never change after being set.
         self.identifier = identifier
@@ -69,24 +107,30 @@ class EdgeGene:
         self.is_enabled = is_enabled
 
         if self.weight is None:
-            self.weight = uniform(initial_weight_min, initial_weight_max)
+            self.weight = (rng or random_module).uniform(initial_weight_min, initial_weight_max)
 
-        self.innovation = "{}->{}".format(self.input_node_identifier, self.output_node_identifier)
         if self.innovation_number is None:
             self.set_innovation_number()
 
         self.sanity_check()
 
-    # The global_innovations dictionary contains a list of all unique edges that have ever been created, along with
-    # their innovation numbers. This is to avoid the competing conventions problem.
-    def set_innovation_number(self):
+    # Returns the key identifying edges between the given nodes in Genomes and in the innovation_tracker.
+    @classmethod
+    def innovation_key(cls, input_node_identifier, output_node_identifier):
 
-        if self.innovation in global_innovations:
-            self.innovation_number = global_innovations[self.innovation]
+        return (input_node_identifier, output_node_identifier)
 
-        else:
-            self.innovation_number = max(global_innovations.values()) + 1
-            global_innovations.update({self.innovation : self.innovation_number})
+    # The innovation key of the edge is derived from its node identifiers rather than stored.
+    @property
+    def innovation(self):
+
+        return (self.input_node_identifier, self.output_node_identifier)
+
+    # The innovation_tracker contains all unique edges that have ever been created, along with their innovation numbers.
+    # This is to avoid the competing conventions problem.
+    def set_innovation_number(self):
+
+        self.innovation_number = innovation_tracker.get_innovation_number(self.innovation)
 
     def sanity_check(self):
 
@@ -113,6 +157,32 @@ class EdgeGene:
 
         return self.__str__()
 
+    # Returns a copy of the EdgeGene, made by copying each of its attributes. They are all immutable, so the copy shares
+    # them with the original.
+    def copy(self):
+
+        edge = EdgeGene.__new__(EdgeGene)
+        edge.identifier = self.identifier
+        edge.innovation_number = self.innovation_number
+        edge.input_node_identifier = self.input_node_identifier
+        edge.output_node_identifier = self.output_node_identifier
+        edge.weight = self.weight
+        edge.is_enabled = self.is_enabled
+        return edge
+
+    # Older, unslotted EdgeGenes also stored their innovation as a string, which is ignored.
+    def __getstate__(self):
+
+        return tuple(getattr(self, attribute) for attribute in EdgeGene.__slots__)
+
+    def __setstate__(self, state):
+
+        if isinstance(state, dict):
+            state = [state[attribute] for attribute in EdgeGene.__slots__]
+
+        for attribute, value in zip(EdgeGene.__slots__, state):
+            setattr(self, attribute, value)
+
 class Genome:
 
     # Basic Genome constructor.
@@ -127,22 +197,196 @@ class Genome:
 
         self.nodes = []
         if nodes is not None:
-            self.nodes = deepcopy(nodes)
+            self.nodes = [node.copy() for node in nodes]
 
         self.edges = []
         if edges is not None:
-            self.edges = deepcopy(edges)
+            self.edges = [edge.copy() for edge in edges]
 
         self.fitness = None
 
+        self.rebuild_indexes()
+
+    # The Genome keeps indexes of its nodes by identifier, of its edges by innovation, and of the input and output edges
+    # (enabled or not) of each node, as well as the number of enabled edges and a topological order of its hidden
+    # nodes. These are kept consistent by add_node(), add_edge(), remove_edge() and remove_node(), and rebuilt from the
+    # node and edge lists whenever a Genome is created, copied or unpickled.
+    def rebuild_indexes(self):
+
+        self.nodes_by_identifier = {}
+        self.edges_by_innovation = {}
+        self.input_edges_by_node  = {}
+        self.output_edges_by_node = {}
+        self.max_node_identifier = 0
+        self.max_edge_identifier = 0
+        self.num_enabled_edges = 0
+
+        # Layers computed by FeedForwardNeuralNetwork.set_topology(), discarded whenever the structure changes.
+        self.topology_cache = None
+
+        for node in self.nodes:
+            self.index_node(node)
+
+        for edge in self.edges:
+            self.index_edge(edge)
+
+        self.set_node_order()
+
+    def index_node(self, node):
+
+        self.nodes_by_identifier[node.identifier] = node
+        self.input_edges_by_node.setdefault(node.identifier, [])
+        self.output_edges_by_node.setdefault(node.identifier, [])
+        self.max_node_identifier = max(self.max_node_identifier, node.identifier)
+
+    def index_edge(self, edge):
+
+        self.edges_by_innovation[edge.innovation] = edge
+        self.input_edges_by_node.setdefault(edge.output_node_identifier, []).append(edge)
+        self.output_edges_by_node.setdefault(edge.input_node_identifier, []).append(edge)
+        self.max_edge_identifier = max(self.max_edge_identifier, edge.identifier)
+        if edge.is_enabled:
+            self.num_enabled_edges += 1
+
+    # Input nodes have no input edges and output nodes have no output edges, so only an edge between two hidden nodes
+    # can create a cycle. The Genome therefore keeps a topological order of its hidden nodes, over all of its edges
+    # whether they are enabled or not, as a position for each hidden node. An edge from a hidden node to a hidden node
+    # later in the order can never create a cycle. Since disabled edges are included, re-enabling an edge can never
+    # create a cycle either.
+    #
+    # Genomes created by older versions may contain cycles through disabled edges. Their order only takes enabled edges
+    # into account, so re-enabling an edge must update it.
+    def set_node_order(self):
+
+        hidden_node_identifiers = [node.identifier for node in self.nodes if not node.is_input_node and not node.is_output_node]
+
+        self.node_order_includes_disabled_edges = True
+        order = self.get_node_order(hidden_node_identifiers)
+        if len(order) < len(hidden_node_identifiers):
+            self.node_order_includes_disabled_edges = False
+            order = self.get_node_order(hidden_node_identifiers)
+
+        assert len(order) == len(hidden_node_identifiers), "The enabled edges of genome {} contain a cycle.".format(self.identifier)
+
+        self.node_order_positions = {identifier : position for position, identifier in enumerate(order)}
+        self.max_node_order_position = len(order) - 1
+
+    # Returns the given hidden nodes in topological order (Kahn's algorithm), leaving out any node on a cycle.
+    def get_node_order(self, hidden_node_identifiers):
+
+        num_hidden_inputs = {identifier : 0 for identifier in hidden_node_identifiers}
+        for identifier in hidden_node_identifiers:
+            for edge in self.output_edges_by_node[identifier]:
+                if edge.output_node_identifier in num_hidden_inputs and self.is_ordered_edge(edge):
+                    num_hidden_inputs[edge.output_node_identifier] += 1
+
+        order = [identifier for identifier in hidden_node_identifiers if num_hidden_inputs[identifier] == 0]
+        index = 0
+        while index < len(order):
+            for edge in self.output_edges_by_node[order[index]]:
+                if edge.output_node_identifier in num_hidden_inputs and self.is_ordered_edge(edge):
+                    num_hidden_inputs[edge.output_node_identifier] -= 1
+                    if num_hidden_inputs[edge.output_node_identifier] == 0:
+                        order.append(edge.output_node_identifier)
+            index += 1
+
+        return order
+
+    # Returns True if the order of the hidden nodes takes the given edge into account.
+    def is_ordered_edge(self, edge):
+
+        return edge.is_enabled or self.node_order_includes_disabled_edges
+
+    # Updates the order of the hidden nodes for a new edge between two hidden nodes, following the dynamic topological
+    # sort of Pearce and Kelly: only the nodes between the two ends of the edge in the current order are visited, and
+    # their positions are reassigned among themselves.
+    def update_node_order(self, edge):
+
+        positions = self.node_order_positions
+        if edge.input_node_identifier not in positions or edge.output_node_identifier not in positions:
+            return
+
+        lower_bound = positions[edge.output_node_identifier]
+        upper_bound = positions[edge.input_node_identifier]
+        if lower_bound > upper_bound:
+            return
+
+        # Hidden nodes which are reachable from the output node of the edge, and come no later than its input node.
+        forward_nodes = self.get_ordered_successors(edge.output_node_identifier, upper_bound)
+        assert edge.input_node_identifier not in forward_nodes, "Edge {} creates a cycle.".format(edge.innovation)
+
+        # Hidden nodes from which the input node of the edge is reachable, and which come after its output node.
+        backward_nodes = [edge.input_node_identifier]
+        visited = {edge.input_node_identifier}
+        index = 0
+        while index < len(backward_nodes):
+            for input_edge in self.input_edges_by_node[backward_nodes[index]]:
+                node_identifier = input_edge.input_node_identifier
+                if node_identifier in positions and node_identifier not in visited and positions[node_identifier] > lower_bound and self.is_ordered_edge(input_edge):
+                    visited.add(node_identifier)
+                    backward_nodes.append(node_identifier)
+            index += 1
+
+        forward_nodes.sort(key=lambda identifier : positions[identifier])
+        backward_nodes.sort(key=lambda identifier : positions[identifier])
+        available_positions = sorted(positions[identifier] for identifier in forward_nodes + backward_nodes)
+        for position, identifier in zip(available_positions, backward_nodes + forward_nodes):
+            positions[identifier] = position
+
+    # Returns the hidden nodes reachable from the given hidden node, including itself, whose position in the order of
+    # hidden nodes is at most upper_bound.
+    def get_ordered_successors(self, node_identifier, upper_bound):
+
+        positions = self.node_order_positions
+        successors = [node_identifier]
+        visited = {node_identifier}
+        index = 0
+        while index < len(successors):
+            for output_edge in self.output_edges_by_node[successors[index]]:
+                successor = output_edge.output_node_identifier
+                if successor in positions and successor not in visited and positions[successor] <= upper_bound and self.is_ordered_edge(output_edge):
+                    visited.add(successor)
+                    successors.append(successor)
+            index += 1
+
+        return successors
+
+    # Returns True if an edge between the given nodes would create a cycle, through enabled or disabled edges.
+    def creates_cycle(self, input_node_identifier, output_node_identifier):
+
+        positions = self.node_order_positions
+        if input_node_identifier == output_node_identifier:
+            return True
+        if input_node_identifier not in positions or output_node_identifier not in positions:
+            return False
+        if positions[input_node_identifier] < positions[output_node_identifier]:
+            return False
+
+        return input_node_identifier in self.get_ordered_successors(output_node_identifier, positions[input_node_identifier])
+
+    # The indexes are not pickled. They are rebuilt when unpickling, which also works for Genomes pickled before the
+    # indexes existed.
+    def __getstate__(self):
+
+        state = self.__dict__.copy()
+        for attribute in Genome.index_attributes:
+            state.pop(attribute, None)
+        return state
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        self.rebuild_indexes()
+
     def set_identifier(self):
 
-        self.identifier = max(global_genome_identifiers) + 1
-        global_genome_identifiers.append(self.identifier)
+        self.identifier = innovation_tracker.get_genome_identifier()
 
     # Easier way to create a Genome with nodes and possible edges.
     @classmethod
-    def default(cls, num_inputs, num_outputs, num_hidden_nodes=0, aggregation_function=default_aggregation_function, activation_function=default_activation_function, input_aggregation_function=default_input_aggregation_function, input_activation_function=default_input_activation_function, output_activation_function=default_output_activation_function, mode=default_genome_mode, weights="randomized", max_num_hidden_nodes=default_max_num_hidden_nodes, identifier=None):
+    def default(cls, num_inputs, num_outputs, num_hidden_nodes=0, aggregation_function=default_aggregation_function, activation_function=default_activation_function, input_aggregation_function=default_input_aggregation_function, input_activation_function=default_input_activation_function, output_activation_function=default_output_activation_function, mode=default_genome_mode, weights="randomized", max_num_hidden_nodes=default_max_num_hidden_nodes, identifier=None, rng=None):
+
+        rng = rng or random_module
 
         nodes = []
         edges = []
@@ -150,13 +394,13 @@ class Genome:
         genome = Genome(identifier=identifier, num_inputs=num_inputs, num_outputs=num_outputs, max_num_hidden_nodes=max_num_hidden_nodes)
 
         for i in range(num_inputs):
-            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=input_aggregation_function, activation_function=input_activation_function, is_input_node=True, bias=None) )
+            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=input_aggregation_function, activation_function=input_activation_function, is_input_node=True, bias=None, rng=rng) )
 
         for i in range(num_outputs):
-            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=aggregation_function, activation_function=output_activation_function, is_output_node=True, bias=None) )
+            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=aggregation_function, activation_function=output_activation_function, is_output_node=True, bias=None, rng=rng) )
 
         for i in range(num_hidden_nodes):
-            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=aggregation_function, activation_function=activation_function) )
+            genome.add_node( NodeGene(genome.next_node_identifier(), aggregation_function=aggregation_function, activation_function=activation_function, rng=rng) )
 
         if mode == "fully connected":
 
@@ -173,7 +417,7 @@ class Genome:
                         else:
                             weight = 1
 
-                        genome.add_edge( EdgeGene(input_node.identifier, hidden_node.identifier, weight=weight, identifier=genome.next_edge_identifier()) )
+                        genome.add_edge( EdgeGene(input_node.identifier, hidden_node.identifier, weight=weight, identifier=genome.next_edge_identifier(), rng=rng) )
 
                 for hidden_node in hidden_nodes:
                     for output_node in output_nodes:
@@ -183,37 +427,41 @@ class Genome:
                         else:
                             weight = 1
 
-                        genome.add_edge( EdgeGene(hidden_node.identifier, output_node.identifier, weight=weight, identifier=genome.next_edge_identifier()) )
+                        genome.add_edge( EdgeGene(hidden_node.identifier, output_node.identifier, weight=weight, identifier=genome.next_edge_identifier(), rng=rng) )
             else:
                 for input_node in input_nodes:
                     for output_node in output_nodes:
 
                         if weights == "randomized":
-                            weight = uniform(global_weight_min, global_weight_max)
+                            weight = rng.uniform(global_weight_min, global_weight_max)
                         else:
                             weight = 1
 
-                        genome.add_edge( EdgeGene(input_node.identifier, output_node.identifier, weight=weight, identifier=genome.next_edge_identifier()) )
+                        genome.add_edge( EdgeGene(input_node.identifier, output_node.identifier, weight=weight, identifier=genome.next_edge_identifier(), rng=rng) )
 
         return genome
 
     @classmethod
-    def crossover(cls, genome1, genome2):
+    def crossover(cls, genome1, genome2, rng=None):
+
+        rng = rng or random_module
 
         assert genome1.fitness is not None
         assert genome2.fitness is not None
         # assert Genome.similarity(genome1, genome2) >= species_similarity_threshold
 
+        start = perf_counter()
+
         better_parent = genome1 if genome1.fitness >= genome2.fitness else genome2
         worse_parent  = genome2 if genome2.fitness <  genome1.fitness else genome1
 
-        worse_parent_edges = {edge.innovation : edge for edge in worse_parent.edges}
+        worse_parent_edges = worse_parent.edges_by_innovation
         edges = []
         for edge in better_parent.edges:
             if edge.innovation in worse_parent_edges:
 
                 possible_edges = [edge, worse_parent_edges[edge.innovation]]
-                edges.append( choice( possible_edges ) )
+                edges.append( rng.choice( possible_edges ) )
 
             else:
                 edges.append(edge)
@@ -224,8 +472,7 @@ class Genome:
         used_node_identifiers = used_node_identifiers.union(edge.output_node_identifier for edge in edges if edge.is_enabled)
 
         nodes = []
-        better_parent_nodes = {node.identifier : node for node in better_parent.nodes}
-        worse_parent_nodes = {node.identifier : node for node in worse_parent.nodes}
+        worse_parent_nodes = worse_parent.nodes_by_identifier
         for node in better_parent.nodes:
             if node.identifier in worse_parent_nodes:
 
@@ -234,15 +481,15 @@ class Genome:
                 # The node must be enabled.
                 if node.identifier in used_node_identifiers:
                     truly_possible_nodes = [node for node in possible_nodes if node.is_enabled]
-                    nodes.append( choice(truly_possible_nodes) )
+                    nodes.append( rng.choice(truly_possible_nodes) )
                 else:
-                    nodes.append( choice(possible_nodes) )
+                    nodes.append( rng.choice(possible_nodes) )
 
             else:
                 nodes.append(node)
 
         # assert len(used_node_identifiers) <= (genome1.max_num_hidden_nodes + 3), str(genome1) + str(genome2) + str(nodes)
-        assert used_node_identifiers.issubset(set([node.identifier for node in nodes]))
+        assert used_node_identifiers.issubset(node.identifier for node in nodes)
 
         # assert len([node for node in nodes if not node.is_input_node and not node.is_output_node and node.is_enabled]) <= genome1.max_num_hidden_nodes, str(genome1) + str(genome2) + str(nodes) + str(edges)
 
@@ -251,6 +498,9 @@ class Genome:
         for edge in edges:
             child.add_edge(edge)
 
+        if record_operator_statistics:
+            operator_statistics.record_crossover(perf_counter() - start)
+
         return child
 
     @classmethod
@@ -276,7 +526,9 @@ class Genome:
 
         return numerator / denominator
 
-    def random_mutation(self):
+    def random_mutation(self, rng=None):
+
+        rng = rng or random_module
 
         theoretically_possible_mutations = Genome.mutations.copy()
 
@@ -299,8 +551,11 @@ class Genome:
 
         # We cannot add an edge if the graph is fully connected, or if the addition of any new edge would result
         # in a cycle, since we are using only feed-forward networks.
-        if self.get_possible_edge() == None:
+        start = perf_counter()
+        if not self.can_add_edge():
             theoretically_possible_mutations.pop(Genome.mutate_add_edge, None)
+        if record_operator_statistics:
+            operator_statistics.record_feasibility_time(Genome.mutation_names[Genome.mutate_add_edge], perf_counter() - start)
 
         # We cannot modify an edge if the Genome contains no edges.
         if self.num_edges() == 0:
@@ -310,20 +565,31 @@ class Genome:
         # Ensure that the random number is greater than the probability of at least one of the mutations.
         # This way we know that at least one mutation is guaranteed to happen.
         random_number_max = max(theoretically_possible_mutations.values()) - 0.00001
-        random_number = uniform(0, random_number_max)
+        random_number = rng.uniform(0, random_number_max)
 
         # Filter possible mutations by probability according to the randomly generated number.
         possible_mutations = [mutation for mutation in theoretically_possible_mutations if theoretically_possible_mutations[mutation] > random_number]
 
         # Choose a random element from the possible mutations and carry it out.
-        mutation = choice(possible_mutations)
-        mutation(self)
+        mutation = rng.choice(possible_mutations)
+
+        if not record_operator_statistics:
+            mutation(self, rng)
+            return
+
+        for infeasible_mutation in Genome.mutations:
+            if infeasible_mutation not in theoretically_possible_mutations:
+                operator_statistics.record_infeasible_mutation(Genome.mutation_names[infeasible_mutation])
+
+        start = perf_counter()
+        mutation(self, rng)
+        operator_statistics.record_mutation(Genome.mutation_names[mutation], perf_counter() - start)
 
     # Adds a random enabled node to the Genome.
-    def mutate_add_node(self):
+    def mutate_add_node(self, rng=None):
 
-        new_node = self.get_possible_node()
-        edge = self.get_random_existing_edge()
+        new_node = self.get_possible_node(rng)
+        edge = self.get_random_existing_edge(rng)
 
         assert new_node is not None
         assert edge.is_enabled
@@ -343,136 +609,175 @@ class Genome:
 
 
     # Selects a random enabled node and disables it.
-    def mutate_remove_node(self):
+    def mutate_remove_node(self, rng=None):
 
-        removed_node = self.get_random_existing_hidden_node()
+        removed_node = self.get_random_existing_hidden_node(rng)
         self.remove_node(removed_node)
 
     # Selects a random enabled node and changes its bias to a random number constrained by global_bias_min and global_bias_max.
-    def mutate_perturb_bias(self):
+    def mutate_perturb_bias(self, rng=None):
 
-        perturbed_node = self.get_random_existing_hidden_or_output_node()
-        self.perturb_bias(perturbed_node)
+        perturbed_node = self.get_random_existing_hidden_or_output_node(rng)
+        self.perturb_bias(perturbed_node, rng)
 
     # Selects a random enabled node and changes its aggregation function to a random different function in the list of
     # aggregation functions.
-    def mutate_change_aggregation_function(self):
+    def mutate_change_aggregation_function(self, rng=None):
 
-        changed_node = self.get_random_existing_hidden_node()
+        changed_node = self.get_random_existing_hidden_node(rng)
         possible_aggregation_functions = aggregation_functions.copy()
         possible_aggregation_functions.remove(changed_node.aggregation_function)
-        changed_node.aggregation_function = choice(possible_aggregation_functions)
+        changed_node.aggregation_function = (rng or random_module).choice(possible_aggregation_functions)
 
     # Selects a random enabled node and changes its activation function to a random different function in the list of
     # activation functions.
-    def mutate_change_activation_function(self):
+    def mutate_change_activation_function(self, rng=None):
 
-        changed_node = self.get_random_existing_hidden_node()
+        changed_node = self.get_random_existing_hidden_node(rng)
         possible_activation_functions = activation_functions.copy()
         possible_activation_functions.remove(changed_node.activation_function)
-        changed_node.activation_function = choice(possible_activation_functions)
+        changed_node.activation_function = (rng or random_module).choice(possible_activation_functions)
 
     # Creates and adds a random edge.
-    def mutate_add_edge(self):
+    def mutate_add_edge(self, rng=None):
 
-        new_edge = self.get_possible_edge()
+        new_edge = self.get_possible_edge(rng)
         self.add_edge(new_edge)
 
     # Selects and disables a random enabled edge.
-    def mutate_remove_edge(self):
+    def mutate_remove_edge(self, rng=None):
 
-        removed_edge = self.get_random_existing_edge()
+        removed_edge = self.get_random_existing_edge(rng)
         self.remove_edge(removed_edge)
 
     # Selects an edge and changes its weight to a random number constrained by global_weight_min and global_weight_max.
-    def mutate_perturb_weight(self):
+    def mutate_perturb_weight(self, rng=None):
 
-        perturbed_edge = self.get_random_existing_edge()
-        self.perturb_weight(perturbed_edge)
+        perturbed_edge = self.get_random_existing_edge(rng)
+        self.perturb_weight(perturbed_edge, rng)
 
     # Adds a given node to the Genome.
     def add_node(self, node):
 
         assert node is not None
         assert self.num_hidden_nodes() < self.max_num_hidden_nodes
-        assert node.identifier not in [node.identifier for node in self.nodes]
+        assert node.identifier not in self.nodes_by_identifier
         self.nodes.append(node)
+        self.index_node(node)
+        self.topology_cache = None
+
+        # New hidden nodes have no edges yet, so they can go anywhere in the order of hidden nodes.
+        if not node.is_input_node and not node.is_output_node:
+            self.max_node_order_position += 1
+            self.node_order_positions[node.identifier] = self.max_node_order_position
 
     # generates the next possible node, if the genome has not already reached max_nodes number of nodes.
     # does not add the node to the genome. this is an intermediate function that should not be called from the outside.
-    def get_possible_node(self):
+    def get_possible_node(self, rng=None):
 
         new_node = None
         if self.max_num_hidden_nodes is None or self.num_hidden_nodes() < self.max_num_hidden_nodes:
-            new_node = NodeGene(self.next_node_identifier())
+            new_node = NodeGene(self.next_node_identifier(), rng=rng)
         return new_node
 
     # Adds a given edge to the Genome.
     def add_edge(self, edge):
 
-        edge = deepcopy(edge)
+        edge = edge.copy()
 
         edge.identifier = self.next_edge_identifier()
 
+        existing_edge = self.edges_by_innovation.get(edge.innovation)
+        self.topology_cache = None
+
         # Sanity check
-        assert edge.innovation not in [edge.innovation for edge in self.edges if edge.is_enabled]
+        assert existing_edge is None or not existing_edge.is_enabled
         if edge.is_enabled:
-            for node in self.nodes:
-                if node.identifier == edge.input_node_identifier or node.identifier == edge.output_node_identifier:
+            for node_identifier in [edge.input_node_identifier, edge.output_node_identifier]:
+                node = self.nodes_by_identifier.get(node_identifier)
+                if node is not None:
                     assert node.is_enabled
 
-        existing_edge = ([existing_edge for existing_edge in self.edges if existing_edge.innovation == edge.innovation] + [None])[0]
         if existing_edge is None:
             self.edges.append(edge)
+            self.index_edge(edge)
+            self.update_node_order(edge)
         else:
+            self.num_enabled_edges += 1
             existing_edge.is_enabled = True
+            if not self.node_order_includes_disabled_edges:
+                self.update_node_order(existing_edge)
             existing_edge.weight = edge.weight
 
     # generates a random possible edge, if there is any pair of nodes in the genome for which an edge can be created.
     # this function avoids creating duplicate edges and cycles. does not add the edge to the genome.
     # this is an intermediate function that should not be called from the outside.
-    def get_possible_edge(self):
+    def get_possible_edge(self, rng=None):
 
+        rng = rng or random_module
         new_edge = None
 
-        possible_input_nodes = [node for node in self.nodes if not node.is_output_node and node.is_enabled]
-        possible_output_nodes = [node for node in self.nodes if not node.is_input_node and node.is_enabled]
+        if self.can_add_edge():
 
-        shuffle(possible_input_nodes)
-        shuffle(possible_output_nodes)
+            possible_input_nodes = [node for node in self.nodes if not node.is_output_node and node.is_enabled]
+            possible_output_nodes = [node for node in self.nodes if not node.is_input_node and node.is_enabled]
 
-        found_edge = False
-        possible_input_node_index = 0
-        while possible_input_node_index < len(possible_input_nodes) and not found_edge:
-            predecessors = self.get_predecessors(possible_input_nodes[possible_input_node_index])
+            # Random pairs of nodes are almost always possible edges, unless the genome is nearly fully connected.
+            for attempt in range(max_random_edge_attempts):
 
-            possible_output_node_index = 0
-            while possible_output_node_index < len(possible_output_nodes) and not found_edge:
+                input_node_identifier = rng.choice(possible_input_nodes).identifier
+                output_node_identifier = rng.choice(possible_output_nodes).identifier
 
-                input_node_identifier = possible_input_nodes[possible_input_node_index].identifier
-                output_node_identifier = possible_output_nodes[possible_output_node_index].identifier
-                innovation = "{}->{}".format(input_node_identifier, output_node_identifier)
+                if self.is_possible_edge(input_node_identifier, output_node_identifier):
+                    new_edge = EdgeGene(input_node_identifier, output_node_identifier, identifier=self.next_edge_identifier(), rng=rng)
+                    break
 
-                if innovation not in [edge.innovation for edge in self.edges if edge.is_enabled] and possible_output_nodes[possible_output_node_index].identifier not in predecessors:
+            # Otherwise, search all pairs of nodes in random order. can_add_edge() guarantees that one is possible.
+            if new_edge is None:
 
-                    new_edge = EdgeGene(input_node_identifier, output_node_identifier, identifier=self.next_edge_identifier())
-                    found_edge = True
+                rng.shuffle(possible_input_nodes)
+                rng.shuffle(possible_output_nodes)
 
-                possible_output_node_index += 1
-
-            possible_input_node_index += 1
+                possible_edges = ([input_node.identifier, output_node.identifier] for input_node in possible_input_nodes for output_node in possible_output_nodes)
+                input_node_identifier, output_node_identifier = next(possible_edge for possible_edge in possible_edges if self.is_possible_edge(*possible_edge))
+                new_edge = EdgeGene(input_node_identifier, output_node_identifier, identifier=self.next_edge_identifier(), rng=rng)
 
         return new_edge
 
+    # Returns True if an edge from the input node to the output node is not already enabled and would not create a
+    # cycle.
+    def is_possible_edge(self, input_node_identifier, output_node_identifier):
+
+        existing_edge = self.edges_by_innovation.get(EdgeGene.innovation_key(input_node_identifier, output_node_identifier))
+        if existing_edge is not None and existing_edge.is_enabled:
+            return False
+
+        return not self.creates_cycle(input_node_identifier, output_node_identifier)
+
+    # Returns True if get_possible_edge() can find an edge. Every enabled edge goes from an input or hidden node to a
+    # hidden or output node later in the topological order (in which input nodes come first and output nodes last).
+    # Conversely, any such pair of enabled nodes can be connected without creating a cycle, and any other pair of
+    # hidden nodes cannot once all such pairs are connected. So an edge can be added if and only if there are fewer
+    # enabled edges than such pairs.
+    def can_add_edge(self):
+
+        num_inputs = len([node for node in self.nodes if node.is_input_node])
+        num_outputs = len([node for node in self.nodes if node.is_output_node])
+        num_hidden_nodes = self.num_hidden_nodes()
+
+        num_forward_pairs = num_inputs * (num_hidden_nodes + num_outputs) + num_hidden_nodes * num_outputs + num_hidden_nodes * (num_hidden_nodes - 1) // 2
+
+        return self.num_enabled_edges < num_forward_pairs
+
     # Returns a random, enabled, hidden node.
-    def get_random_existing_hidden_node(self):
+    def get_random_existing_hidden_node(self, rng=None):
 
         assert self.num_hidden_nodes() > 0
-        return choice([node for node in self.nodes if not node.is_input_node and not node.is_output_node and node.is_enabled])
+        return (rng or random_module).choice([node for node in self.nodes if not node.is_input_node and not node.is_output_node and node.is_enabled])
 
-    def get_random_existing_hidden_or_output_node(self):
+    def get_random_existing_hidden_or_output_node(self, rng=None):
 
-        return choice([node for node in self.nodes if (node.is_output_node or not node.is_input_node)])
+        return (rng or random_module).choice([node for node in self.nodes if (node.is_output_node or not node.is_input_node)])
 
     # Nothing is ever removed from the genome. Instead, the node and connected edges are disabled.
     def remove_node(self, node):
@@ -480,74 +785,43 @@ class Genome:
         assert not (node.is_input_node or node.is_output_node)
 
         node.is_enabled = False
-        for edge in self.edges:
-            if edge.input_node_identifier == node.identifier or edge.output_node_identifier == node.identifier:
-                self.remove_edge(edge)
+        self.topology_cache = None
+        for edge in self.input_edges_by_node[node.identifier] + self.output_edges_by_node[node.identifier]:
+            self.remove_edge(edge)
 
     # Returns a random enabled edge.
-    def get_random_existing_edge(self):
+    def get_random_existing_edge(self, rng=None):
 
         random_edge = None
         if self.num_edges() > 0:
-            random_edge = choice([edge for edge in self.edges if edge.is_enabled])
+            random_edge = (rng or random_module).choice([edge for edge in self.edges if edge.is_enabled])
         return random_edge
 
     # Disables the given edge. No component is removed from a Genome. "Removed" components are simply disabled.
     def remove_edge(self, edge):
 
+        if edge.is_enabled:
+            self.num_enabled_edges -= 1
         edge.is_enabled = False
+        self.topology_cache = None
 
-    def perturb_weight(self, edge):
+    def perturb_weight(self, edge, rng=None):
 
-        edge.weight = uniform(global_weight_min, global_weight_max)
+        edge.weight = (rng or random_module).uniform(global_weight_min, global_weight_max)
 
-    def perturb_bias(self, node):
+    def perturb_bias(self, node, rng=None):
 
-        node.bias = uniform(global_bias_min, global_bias_max)
+        node.bias = (rng or random_module).uniform(global_bias_min, global_bias_max)
 
     # Returns the number of enabled edges in the Genome.
     def num_edges(self):
 
-        return len([edge for edge in self.edges if edge.is_enabled])
-
-    # This function returns a list of the identifiers of nodes whose output propagates to the parameter node. This is
-    # used to avoid creating cycles when adding a new edge. It is implemented this way to add as little to the genome
-    # structure as possible.
-    def get_predecessors(self, node):
-
-        predecessors = [node.identifier]
-        node_stack = [node]
-        edge_stack = []
-
-        while len(node_stack) > 0:
-
-            # Add all input edges from each node to the node stack.
-            for current_node in node_stack:
-
-                # print([edge for edge in self.edges if edge.output_node_identifier == current_node.identifier and edge.input_node_identifier not in predecessors])
-                edge_stack += [edge for edge in self.edges if edge.output_node_identifier == current_node.identifier and edge.input_node_identifier not in predecessors]
-
-                # Accumulate the predecessors.
-                if current_node.identifier not in predecessors:
-                    predecessors.append(current_node.identifier)
-
-            # Add all input nodes from each edge in the edge stack to the node stack.
-            node_stack.clear()
-            for edge in edge_stack:
-                node_stack.append(self.get_node(edge.input_node_identifier))
-
-            # Reset the edge stack to an empty list.
-            edge_stack.clear()
-
-        return predecessors
+        return self.num_enabled_edges
 
     # This function gets the NodeGene object that is identified by the identifier parameter.
     def get_node(self, identifier):
 
-        result = None
-        if identifier in [node.identifier for node in self.nodes]:
-            result = [node for node in self.nodes if node.identifier == identifier][0]
-        return result
+        return self.nodes_by_identifier.get(identifier)
 
     # Returns the number of enabled hidden nodes in the Genome.
     def num_hidden_nodes(self):
@@ -561,22 +835,105 @@ class Genome:
     # Get the identifier of any node added to the Genome at this point.
     def next_node_identifier(self):
 
-        return max([node.identifier for node in self.nodes] + [0]) + 1
+        return self.max_node_identifier + 1
 
     # Get the identifier of any edge added to the Genome at this point.
     def next_edge_identifier(self):
 
-        return max([edge.identifier for edge in self.edges] + [0]) + 1
+        return self.max_edge_identifier + 1
+
+    # Returns a copy of the Genome, with the same identifier and fitness, which shares no genes with this one.
+    def copy(self):
+
+        genome = Genome(num_inputs=self.num_inputs, num_outputs=self.num_outputs, nodes=self.nodes, edges=self.edges, max_num_hidden_nodes=self.max_num_hidden_nodes, identifier=self.identifier)
+        genome.fitness = self.fitness
+
+        # The topology cache is replaced rather than modified when the structure changes, so it can be shared.
+        genome.topology_cache = self.topology_cache
+
+        return genome
+
+    # Returns a key which is equal for two Genomes if and only if they have the same enabled nodes, with the same
+    # functions, and the same enabled edges. Such Genomes produce neural networks which differ only in their weights and
+    # biases.
+    def structural_fingerprint(self):
+
+        nodes = tuple(sorted((node.identifier, node.is_input_node, node.is_output_node, aggregation_function_codes[node.aggregation_function], activation_function_codes[node.activation_function], node.bias is None) for node in self.nodes if node.is_enabled))
+        edges = tuple(sorted(edge.innovation for edge in self.edges if edge.is_enabled))
+
+        return (self.num_inputs, self.num_outputs, nodes, edges)
+
+    # Returns a key which is equal for two Genomes if and only if their neural networks are identical: the same
+    # structure, and the same biases and weights.
+    def content_fingerprint(self):
+
+        biases = tuple(node.bias for node in sorted(self.nodes, key=lambda node : node.identifier) if node.is_enabled)
+        weights = tuple(edge.weight for edge in sorted(self.edges, key=lambda edge : edge.innovation) if edge.is_enabled)
+
+        return (self.structural_fingerprint(), biases, weights)
+
+    # Returns a compact encoding of the Genome made only of tuples, numbers and booleans, with functions replaced by
+    # their codes. This is much cheaper to send to other processes than the Genome itself.
+    def encode(self):
+
+        nodes = tuple((node.identifier, aggregation_function_codes[node.aggregation_function], node.bias, activation_function_codes[node.activation_function], node.is_input_node, node.is_output_node, node.is_enabled) for node in self.nodes)
+        edges = tuple((edge.identifier, edge.innovation_number, edge.input_node_identifier, edge.output_node_identifier, edge.weight, edge.is_enabled) for edge in self.edges)
+
+        return (self.identifier, self.num_inputs, self.num_outputs, self.max_num_hidden_nodes, self.fitness, nodes, edges)
+
+    # Rebuilds a Genome from the result of Genome.encode(). Genes are restored from their state rather than constructed,
+    # like in serialization.py, so no identifiers, innovation numbers or random numbers are generated.
+    @classmethod
+    def decode(cls, encoding):
+
+        identifier, num_inputs, num_outputs, max_num_hidden_nodes, fitness, node_encodings, edge_encodings = encoding
 
+        nodes = []
+        for node_identifier, aggregation_code, bias, activation_code, is_input_node, is_output_node, is_enabled in node_encodings:
+            node = NodeGene.__new__(NodeGene)
+            node.__setstate__((node_identifier, aggregation_functions[aggregation_code], activation_functions[activation_code], is_input_node, is_output_node, is_enabled, bias))
+            nodes.append(node)
+
+        edges = []
+        for edge_encoding in edge_encodings:
+            edge = EdgeGene.__new__(EdgeGene)
+            edge.__setstate__(edge_encoding)
+            edges.append(edge)
+
+        genome = Genome.__new__(Genome)
+        genome.__setstate__({"identifier" : identifier,
+                             "num_inputs" : num_inputs,
+                             "num_outputs" : num_outputs,
+                             "max_num_hidden_nodes" : max_num_hidden_nodes,
+                             "nodes" : nodes,
+                             "edges" : edges,
+                             "fitness" : fitness})
+        return genome
+
+    # Genomes are saved in the binary format of serialization.py, or as JSON if the filename ends with ".json".
     def save(self, filename):
 
-        file = open(filename, "wb")
-        pickle.dump(self, file, protocol=-1)
+        from serialization import save_genomes, save_genome_json
+
+        if filename.endswith(".json"):
+            save_genome_json(self, filename)
+        else:
+            save_genomes([self], filename)
 
+    # Loads a Genome saved by Genome.save(), or pickled by older versions.
     @classmethod
     def from_file(cls, filename):
-        file = open(filename, "rb")
-        return pickle.load(file)
+
+        from serialization import is_genome_file, load_genomes, load_genome_json
+
+        if filename.endswith(".json"):
+            return load_genome_json(filename)
+
+        if is_genome_file(filename):
+            return load_genomes(filename)[0]
+
+        with open(filename, "rb") as file:
+            return pickle.load(file)
 
     def __str__(self):
 
@@ -599,6 +956,9 @@ class Genome:
 
         return self.__str__()
 
+# Attributes of a Genome which are rebuilt by Genome.rebuild_indexes() rather than pickled.
+Genome.index_attributes = ["nodes_by_identifier", "edges_by_innovation", "input_edges_by_node", "output_edges_by_node", "max_node_identifier", "max_edge_identifier", "num_enabled_edges", "node_order_positions", "max_node_order_position", "node_order_includes_disabled_edges", "topology_cache"]
+
 # A dictionary of all Genome mutations, paired with their respective probabilities.
 Genome.mutations = {
     Genome.mutate_add_node                      : mutate_add_node_probability,
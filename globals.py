@@ -6,6 +6,7 @@ file_dir = os.path.dirname(__file__)
 sys.path.append(file_dir)
 
 from functions import *
+from innovations import *
 
 # Adjustable parameters for configuring the evolution
 
@@ -25,6 +26,7 @@ global_weight_max = 10
 # variables for mutating edges with Genome.mutate_add_edge
 initial_weight_min = -2
 initial_weight_max = 2
+max_random_edge_attempts = 20 # random pairs of nodes to try before searching all pairs for a possible edge
 
 # variables for NodeGenes
 # default_aggregation_function = "sum"
@@ -46,6 +48,10 @@ default_output_activation_function = sigmoid
 default_genome_mode = "unconnected"
 # default_genome_mode = "fully connected"
 
+# variables for FeedForwardNeuralNetworks
+# Compiled networks evaluate a flat, array-backed plan instead of walking Node objects. Outputs are identical.
+compile_neural_networks = True
+
 # variables for comparing genomes
 node_gene_similarity_measure = 0.8
 node_bias_similarity_measure = 0
@@ -54,6 +60,17 @@ node_activation_function_similarity_measure  = 0
 edge_gene_similarity_measure = 0.8
 edge_weight_similarity_measure = 0
 
+# Speciation compares all misfits against all species representatives in a batched matrix product. Species are identical.
+vectorize_speciation = True
+speciation_block_size = 256 # number of genomes without a species compared against the new species at once
+
+# Assigns genomes to the most similar compatible species rather than to the first one. Candidate species are found with
+# a MinHash index over the representatives, made of species_index_num_bands bands of species_index_band_size hashes.
+assign_to_nearest_species = False
+species_index_num_bands = 16
+species_index_band_size = 3
+species_index_full_scan = False # compare genomes without a compatible candidate against every species
+
 # variables for mutating genomes
 max_num_mutations_per_individual_per_generation = 1
 mutate_add_node_probability = 0.2
@@ -79,6 +96,28 @@ species_average_fitness_time = 20 # number of generations over which to calculat
 default_population_size = 150
 default_max_num_hidden_nodes = 15
 default_num_initial_mutations = 1
+default_network_cache_size = 1000 # number of network topologies cached across generations (0 disables the cache)
+default_checkpoint_frequency = 10 # number of generations between checkpoints
+default_checkpoint_retention = 3 # number of most recent checkpoints kept (None keeps all of them)
+
+# Champions, run logs and checkpoints are written by a background thread, so that generations do not wait for the disk.
+use_background_writer = True
+default_background_queue_size = 8 # number of writes which may be pending before the evolution loop waits for them
+
+# Counts and times mutation operators and crossovers (see telemetry.py and Population.get_metrics).
+record_operator_statistics = True
+
+# Writes the time spent in each phase of a generation to the run log, besides the total time of the generation, so that
+# slow phases can be found after a long run. Timing callbacks get them either way (see Population.add_timing_callback).
+log_phase_times = True
+
+# Largest number of children bred by one task of a ParallelReproducer (see reproduction.py). Larger species are split
+# into several tasks, so that the work is spread over the workers even when there are few species.
+default_max_reproduction_task_size = 64
+
+# variables for the island model (see islands.py)
+default_migration_interval = 10 # number of generations between migrations
+default_num_migrants = 2 # number of genomes each island sends to the next one at each migration
 
 # Set to True if the population size must be exactly equal to the size set by the user. The actual population size
 # varies throughout execution in order to maintain a per-species population of at least 2, which is necessary for
@@ -90,7 +129,6 @@ exact_population_size = True
 # the following are critical variables for NEAT, so it's best not to touch them, but you should definitely touch them
 ########################################################################################################################
 
-# innovations are formatted as "{input_node}->{output_node}" : innovation_number
-global_genome_identifiers = [0]
-global_innovations = {None : 0}
-global_species_identifiers = [0]
+# innovations are formatted as (input_node, output_node) : innovation_number
+innovation_tracker = InnovationTracker()
+global_innovations = innovation_tracker.innovations
@@ -0,0 +1,122 @@
+# Hands out the innovation numbers of edges and the identifiers of genomes and species. Each kind of number comes from a
+# running counter, so handing one out takes constant time however long the run has been going.
+#
+# Innovations are keyed by (input_node, output_node) tuples. Every edge between the same two nodes shares one innovation
+# number for the whole run, which avoids the competing conventions problem in crossover. The innovations created since
+# the last call of step_generation() are also kept in a per-generation registry.
+#
+# Processes which evolve genomes separately and exchange them, such as the islands of islands.py, must agree on these
+# numbers without communicating. After use_distributed_numbering(), innovation numbers are computed from the innovation
+# itself, and each process hands out a disjoint sequence of genome and species identifiers.
+class InnovationTracker:
+
+    def __init__(self):
+
+        self.innovations = {}
+        self.generation_innovations = {}
+
+        self.next_innovation_number = 1
+        self.next_genome_identifier = 1
+        self.next_species_identifier = 1
+
+        self.identifier_stride = 1
+        self.paired_innovation_numbers = False
+
+    # Returns the innovation number of the given (input_node, output_node) innovation, creating it if it is new.
+    def get_innovation_number(self, innovation):
+
+        innovation_number = self.innovations.get(innovation)
+        if innovation_number is None:
+            if self.paired_innovation_numbers:
+                innovation_number = InnovationTracker.pair(*innovation)
+            else:
+                innovation_number = self.next_innovation_number
+                self.next_innovation_number += 1
+            self.innovations[innovation] = innovation_number
+            self.generation_innovations[innovation] = innovation_number
+
+        return innovation_number
+
+    # The Cantor pairing function, which maps every pair of natural numbers to a different natural number.
+    @classmethod
+    def pair(cls, input_node_identifier, output_node_identifier):
+
+        total = input_node_identifier + output_node_identifier
+        return total * (total + 1) // 2 + output_node_identifier
+
+    def get_genome_identifier(self):
+
+        identifier = self.next_genome_identifier
+        self.next_genome_identifier += self.identifier_stride
+        return identifier
+
+    def get_species_identifier(self):
+
+        identifier = self.next_species_identifier
+        self.next_species_identifier += self.identifier_stride
+        return identifier
+
+    # Makes this tracker the index-th of num_processes trackers whose numbers never collide: innovation numbers are the
+    # pairing of their innovations, and genome and species identifiers are those congruent to index + 1 modulo
+    # num_processes.
+    def use_distributed_numbering(self, index, num_processes):
+
+        assert 0 <= index < num_processes
+
+        self.paired_innovation_numbers = True
+        self.identifier_stride = num_processes
+
+        self.next_genome_identifier = self.next_identifier_from(self.next_genome_identifier, index, num_processes)
+        self.next_species_identifier = self.next_identifier_from(self.next_species_identifier, index, num_processes)
+
+    # Returns the smallest identifier from the given one which is congruent to index + 1 modulo num_processes.
+    @classmethod
+    def next_identifier_from(cls, identifier, index, num_processes):
+
+        return identifier + (index + 1 - identifier) % num_processes
+
+    # Returns a tracker without innovations, which numbers innovations and identifiers in the same way as this one.
+    def restarted(self):
+
+        tracker = InnovationTracker()
+        if self.paired_innovation_numbers:
+            tracker.use_distributed_numbering((self.next_genome_identifier - 1) % self.identifier_stride, self.identifier_stride)
+
+        return tracker
+
+    # Starts a new per-generation registry.
+    def step_generation(self):
+
+        self.generation_innovations = {}
+
+    def num_innovations(self):
+
+        return len(self.innovations)
+
+    # Returns a copy of the state of the tracker, for saving it along with a Population.
+    def get_state(self):
+
+        return {"innovations" : dict(self.innovations),
+                "generation_innovations" : dict(self.generation_innovations),
+                "next_innovation_number" : self.next_innovation_number,
+                "next_genome_identifier" : self.next_genome_identifier,
+                "next_species_identifier" : self.next_species_identifier,
+                "identifier_stride" : self.identifier_stride,
+                "paired_innovation_numbers" : self.paired_innovation_numbers}
+
+    # The innovations dictionary is updated in place, since global_innovations refers to it.
+    def set_state(self, state):
+
+        self.innovations.clear()
+        self.innovations.update(state["innovations"])
+        self.generation_innovations = dict(state["generation_innovations"])
+
+        self.next_innovation_number = state["next_innovation_number"]
+        self.next_genome_identifier = state["next_genome_identifier"]
+        self.next_species_identifier = state["next_species_identifier"]
+        self.identifier_stride = state.get("identifier_stride", 1)
+        self.paired_innovation_numbers = state.get("paired_innovation_numbers", False)
+
+    def __str__(self):
+
+        return "{} innovations ({} this generation), next genome {}, next species {}".format(len(self.innovations), len(self.generation_innovations), self.next_genome_identifier, self.next_species_identifier)
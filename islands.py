@@ -0,0 +1,183 @@
+import os
+import sys
+import traceback
+import multiprocessing
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from population import *
+
+# Evolves num_islands Populations in separate processes. Every migration_interval generations, each island sends its
+# num_migrants fittest genomes to the next island of a ring, where they replace random genomes of the next generation.
+# Genomes travel in the compact Genome.encode() encoding.
+#
+# Islands number their innovations and identifiers with InnovationTracker.use_distributed_numbering(), so that the genes
+# of migrants line up with those of their new island in crossover, and genome and species identifiers stay unique.
+#
+# The evaluation function must be picklable (for example, defined at the top level of a module). The remaining keyword
+# arguments are passed to the Population of each island, whose random number generator is seeded with seed + its index.
+# The island index is added to the run_log_name and champion_filename arguments, so that islands write separate files.
+#
+# Islands are not daemonic processes, so that each may evaluate and reproduce its Population in its own pool of worker
+# processes, with copies of the given evaluator and reproducer (see evaluation.py and reproduction.py). They must be
+# stopped with close(), or by using the IslandModel as a context manager.
+class IslandModel:
+
+    def __init__(self, num_islands, evaluation_function, migration_interval=default_migration_interval, num_migrants=default_num_migrants, seed=0, evaluator=None, reproducer=None, **population_arguments):
+
+        assert num_islands > 0
+
+        self.num_islands = num_islands
+        self.evaluation_function = evaluation_function
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+        self.seed = seed
+        self.evaluator = evaluator
+        self.reproducer = reproducer
+
+        # Islands report to the main process rather than writing their own outputs.
+        self.population_arguments = {"output_stream_name" : "None", "champion_filename" : None}
+        self.population_arguments.update(population_arguments)
+
+        self.processes = []
+        self.connections = []
+
+        self.generation = 0
+        self.champion = None
+        self.island_champions = [None] * num_islands
+
+    def start(self):
+
+        for index in range(self.num_islands):
+            connection, island_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_island, args=(island_connection, index, self.num_islands, island_population_arguments(self.population_arguments, index), self.evaluation_function, self.seed + index, self.evaluator, self.reproducer))
+            process.start()
+            island_connection.close()
+
+            self.processes.append(process)
+            self.connections.append(connection)
+
+    # Sends a command to every island, and returns their replies.
+    def command(self, commands):
+
+        for connection, command in zip(self.connections, commands):
+            connection.send(command)
+
+        replies = []
+        for index, connection in enumerate(self.connections):
+            status, reply = connection.recv()
+            if status == "error":
+                raise RuntimeError("Island {} failed:\n{}".format(index, reply))
+            replies.append(reply)
+
+        return replies
+
+    # Runs every island for num_generations generations, or until the champion of an island reaches fitness_goal, and
+    # returns the fittest champion.
+    def run(self, num_generations, fitness_goal=None):
+
+        if len(self.processes) == 0:
+            self.start()
+
+        while self.generation < num_generations and (fitness_goal is None or self.champion is None or self.champion.fitness < fitness_goal):
+
+            num_epoch_generations = min(self.migration_interval, num_generations - self.generation)
+            replies = self.command([("evolve", (num_epoch_generations, fitness_goal, self.num_migrants))] * self.num_islands)
+            self.generation += num_epoch_generations
+
+            emigrants = []
+            for index, (champion_encoding, emigrant_encodings) in enumerate(replies):
+                self.island_champions[index] = Genome.decode(champion_encoding)
+                if self.champion is None or self.island_champions[index].fitness > self.champion.fitness:
+                    self.champion = self.island_champions[index]
+                emigrants.append(emigrant_encodings)
+
+            if self.num_islands > 1 and self.generation < num_generations:
+                self.command([("immigrate", emigrants[index - 1]) for index in range(self.num_islands)])
+
+        return self.champion
+
+    # Stops the islands, and terminates those which do not stop within timeout seconds, such as islands which failed.
+    def close(self, timeout=10):
+
+        for connection in self.connections:
+            try:
+                connection.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        for connection in self.connections:
+            connection.close()
+
+        self.processes = []
+        self.connections = []
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# Returns the arguments of the Population of the index-th island, with its own output files.
+def island_population_arguments(population_arguments, index):
+
+    arguments = dict(population_arguments)
+
+    for name in ["run_log_name", "champion_filename"]:
+        if arguments.get(name) is not None:
+            root, extension = os.path.splitext(arguments[name])
+            arguments[name] = "{}_island{}{}".format(root, index, extension)
+
+    return arguments
+
+# The main function of the process of an island, which evolves its Population according to the commands it receives
+# through connection, and replies to each with ("ok", result) or ("error", traceback).
+def run_island(connection, index, num_islands, population_arguments, evaluation_function, seed_value, evaluator=None, reproducer=None):
+
+    seed(seed_value)
+    innovation_tracker.use_distributed_numbering(index, num_islands)
+    population = None
+
+    while True:
+
+        command, argument = connection.recv()
+
+        if command == "stop":
+            for worker_pool in [evaluator, reproducer]:
+                if worker_pool is not None:
+                    worker_pool.close()
+            if population is not None:
+                population.flush()
+            return
+
+        try:
+            if population is None:
+                population = Population(**population_arguments)
+
+            if command == "evolve":
+                num_generations, fitness_goal, num_emigrants = argument
+                population.run_skeleton(evaluation_function, num_generations=population.generation + num_generations - 1, fitness_goal=fitness_goal, evaluator=evaluator, reproducer=reproducer)
+                reply = (population.champion.encode(), [genome.encode() for genome in population.get_top_genomes(num_emigrants)])
+
+            elif command == "immigrate":
+                population.add_immigrants([Genome.decode(encoding) for encoding in argument])
+                reply = None
+
+            else:
+                raise ValueError("Unknown command {}.".format(command))
+
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+            continue
+
+        connection.send(("ok", reply))
@@ -1,5 +1,6 @@
 import os
 import sys
+from heapq import heapify, heappop, heappush
 
 # For use in contexts where this file is imported from outside this directory.
 file_dir = os.path.dirname(__file__)
@@ -106,15 +107,102 @@ class Edge:
             representation += " (disabled)"
         return representation
 
+# The structural part of the evaluation plan of a compiled FeedForwardNeuralNetwork: everything except the weights and
+# biases. It depends only on the enabled nodes and edges of the genome and on the functions of its nodes (see
+# Genome.structural_fingerprint), so it can be shared by every network with the same structure.
+class NetworkTopology:
+
+    def __init__(self, neural_network):
+
+        positions = {node.identifier : position for position, node in enumerate(neural_network.active_nodes)}
+        input_indices = {node.identifier : index for index, node in enumerate(neural_network.input_nodes)}
+
+        # Nodes propagate in plan order, so each node receives its inputs ordered by the position of their source. Any
+        # input arriving after a node has already been activated is discarded by activate_nodes().
+        incoming = [[] for node in neural_network.active_nodes]
+        for position, node in enumerate(neural_network.active_nodes):
+            for output_node, weight in node.outputs:
+                output_position = positions.get(output_node.identifier)
+                if output_position is not None and output_position > position:
+                    incoming[output_position].append(position)
+
+        self.size = len(neural_network.active_nodes)
+        self.identifiers = [node.identifier for node in neural_network.active_nodes]
+        self.input_indices = []
+        self.offsets = [0]
+        self.sources = []
+        self.connection_innovations = []
+        self.aggregation_codes = []
+        self.activation_codes  = []
+        self.aggregation_functions = []
+        self.activation_functions  = []
+        self.buffer_sizes = []
+        self.is_valid = True
+
+        for position, node in enumerate(neural_network.active_nodes):
+
+            input_index = input_indices.get(node.identifier, -1)
+            self.input_indices.append(input_index)
+
+            for source in incoming[position]:
+                self.sources.append(source)
+                self.connection_innovations.append(EdgeGene.innovation_key(self.identifiers[source], node.identifier))
+            self.offsets.append(len(self.sources))
+
+            self.aggregation_codes.append(aggregation_function_codes[node.aggregation_function])
+            self.activation_codes.append(activation_function_codes[node.activation_function])
+            self.aggregation_functions.append(node.aggregation_function)
+            self.activation_functions.append(node.activation_function)
+
+            buffer_size = int(input_index >= 0) + len(incoming[position]) + int(node.bias is not None)
+            self.buffer_sizes.append(buffer_size)
+
+            # activate_nodes() fails on active nodes that never receive an input.
+            if buffer_size == 0:
+                self.is_valid = False
+
+        # Inactive output nodes are never activated, so their outputs are None.
+        self.output_positions = [positions.get(node.identifier, -1) for node in neural_network.output_nodes]
+
 class FeedForwardNeuralNetwork:
 
-    def __init__(self, genome):
+    # If reuse_topology is True and the structure of the genome has not changed since the last network was built from
+    # it, the layers computed for that network are reused.
+    #
+    # If a NetworkTopology is given, the network is compiled directly from it and from the weights and biases of the
+    # genome. Its Node and Edge objects are then only built if they are used.
+    def __init__(self, genome, compiled=compile_neural_networks, reuse_topology=True, topology=None):
 
         self.genome = genome
         self.identifier  = genome.identifier
         self.num_inputs  = genome.num_inputs
         self.num_outputs = genome.num_outputs
 
+        self.plan_size = None
+        self.topology = topology
+        self.compiled = compiled or topology is not None
+
+        if self.topology is not None:
+            self.set_plan()
+        else:
+            self.generate_object_graph(reuse_topology)
+            if self.compiled:
+                self.compile()
+
+    # Attributes set by generate_object_graph().
+    object_graph_attributes = ["nodes", "nodes_by_identifier", "edges", "input_nodes", "hidden_nodes", "output_nodes", "num_hidden_nodes", "active_nodes", "min_layer", "max_layer"]
+
+    # Builds the Node and Edge objects of networks created from a NetworkTopology when they are first used.
+    def __getattr__(self, name):
+
+        if name in FeedForwardNeuralNetwork.object_graph_attributes and "genome" in self.__dict__:
+            self.generate_object_graph()
+            return self.__dict__[name]
+
+        raise AttributeError(name)
+
+    def generate_object_graph(self, reuse_topology=True):
+
         self.nodes = None
         self.edges = None
 
@@ -128,7 +216,7 @@ class FeedForwardNeuralNetwork:
 
         self.num_hidden_nodes = len([node for node in self.nodes if not node.is_input_node and not node.is_output_node and node.is_enabled])
 
-        self.set_topology()
+        self.set_topology(reuse_topology)
 
         self.active_nodes = [node for node in self.nodes if node.layer is not None]
         self.active_nodes.sort(key = lambda node: node.layer)
@@ -139,15 +227,16 @@ class FeedForwardNeuralNetwork:
     def generate_nodes(self):
 
         self.nodes = []
+        self.nodes_by_identifier = {}
         for node_gene in self.genome.nodes:
 
             node = Node(node_gene)
             self.nodes.append( node )
+            self.nodes_by_identifier[node.identifier] = node
 
     def get_node(self, identifier):
 
-        node = ([node for node in self.nodes if node.identifier == identifier] + [None])[0]
-        return node
+        return self.nodes_by_identifier.get(identifier)
 
     def generate_edges(self):
 
@@ -166,52 +255,217 @@ class FeedForwardNeuralNetwork:
 
             self.edges.append( edge )
 
-    def set_topology(self):
+    def set_topology(self, reuse_topology=True):
+
+        for edge in self.edges:
+            if edge.is_enabled:
+                edge.input_node.outputs.append([edge.output_node, edge.weight])
+
+        # The Genome discards its topology cache whenever its structure changes.
+        topology_cache = self.genome.topology_cache
+        if reuse_topology and topology_cache is not None:
+            node_layers, edge_layers = topology_cache
+            for node in self.nodes:
+                node.layer = node_layers[node.identifier]
+            for edge, edge_layer in zip(self.edges, edge_layers):
+                edge.layer = edge_layer
+
+        else:
+            self.set_forward_layers()
+            self.set_backward_layers()
+            self.genome.topology_cache = [{node.identifier : node.layer for node in self.nodes}, [edge.layer for edge in self.edges]]
+
+    # Sets the layer of every node reachable from the input nodes to 1 + the length of the longest path to it from an
+    # input node, in topological order (Kahn's algorithm). Every edge leaving such a node gets that node's layer + 0.5.
+    def set_forward_layers(self):
+
+        reachable_nodes = set(self.input_nodes)
+        node_stack = list(self.input_nodes)
+        while len(node_stack) > 0:
+            for output_node, weight in node_stack.pop().outputs:
+                if output_node not in reachable_nodes:
+                    reachable_nodes.add(output_node)
+                    node_stack.append(output_node)
 
-        for current_node in self.nodes:
-            for edge in self.edges:
+        num_remaining_inputs = {node : 0 for node in reachable_nodes}
+        for node in reachable_nodes:
+            for output_node, weight in node.outputs:
+                num_remaining_inputs[output_node] += 1
 
-                if edge.input_node == current_node and edge.is_enabled:
+        for node in self.input_nodes:
+            node.layer = 1
 
-                    current_node.outputs.append([edge.output_node, edge.weight])
+        ordered_nodes = [node for node in self.input_nodes if num_remaining_inputs[node] == 0]
+        index = 0
+        while index < len(ordered_nodes):
 
-        # Iterate from input nodes to output nodes, setting layers and output nodes for each node.
-        current_layer = 1
-        node_stack = [node for node in self.input_nodes]
-        while len(node_stack) > 0:
+            current_node = ordered_nodes[index]
+            for output_node, weight in current_node.outputs:
 
-            new_node_stack = []
+                output_node.layer = max(output_node.layer or 0, current_node.layer + 1)
 
-            for current_node in node_stack:
+                num_remaining_inputs[output_node] -= 1
+                if num_remaining_inputs[output_node] == 0:
+                    ordered_nodes.append(output_node)
 
-                current_node.layer = current_layer
+            index += 1
 
-                for edge in self.edges:
-                    if edge.input_node_identifier == current_node.identifier:
-                        edge.layer = current_layer + 0.5
+        for edge in self.edges:
+            if edge.input_node.layer is not None:
+                edge.layer = edge.input_node.layer + 0.5
 
-                # current_node.outputs = [[edge.output_node, edge.weight] for edge in self.edges if edge.input_node_identifier == current_node.identifier and edge.is_enabled]
+    # Nodes which are not reachable from the input nodes but have outputs into layered nodes are placed one layer before
+    # their earliest layered output. Nodes are visited in passes in order of identifier, until a pass layers no more
+    # nodes, and the layer of each node depends on which of its outputs were layered when it was visited. Rather than
+    # visiting every node in every pass, only the nodes with a layered output are visited, in a heap.
+    def set_backward_layers(self):
 
-                new_node_stack += [edge.output_node for edge in self.edges if edge.input_node_identifier == current_node.identifier and edge.is_enabled]
+        node_indexes = {node : index for index, node in enumerate(self.nodes)}
+        inputs = {node : [] for node in self.nodes}
+        for node in self.nodes:
+            for output_node, weight in node.outputs:
+                inputs[output_node].append(node)
+
+        next_pass = {node_indexes[node] for node in self.nodes if node.layer is None and any(output_node.layer is not None for output_node, weight in node.outputs)}
+        while len(next_pass) > 0:
+
+            current_pass = list(next_pass)
+            heapify(current_pass)
+            next_pass = set()
+
+            while len(current_pass) > 0:
+
+                index = heappop(current_pass)
+                current_node = self.nodes[index]
+                if current_node.layer is not None:
+                    continue
+
+                current_node.layer = min(output_node.layer for output_node, weight in current_node.outputs if output_node.layer is not None) - 1
+
+                # Nodes later in the pass see the new layer in the current pass, earlier nodes in the next one.
+                for input_node in inputs[current_node]:
+                    if input_node.layer is None:
+                        if node_indexes[input_node] > index:
+                            heappush(current_pass, node_indexes[input_node])
+                        else:
+                            next_pass.add(node_indexes[input_node])
+
+    # Flattens the active nodes into a topologically ordered evaluation plan. Every active node gets a position in the
+    # plan, and its incoming connections are stored in the flat plan_sources and plan_weights arrays, delimited by
+    # plan_offsets. Each node also gets a preallocated input buffer, so activating the plan allocates nothing per node.
+    # Inputs are accumulated in exactly the order used by activate_nodes(), so the outputs are identical.
+    def compile(self):
+
+        self.topology = NetworkTopology(self)
+        self.set_plan()
+
+    # Sets up the evaluation plan from the NetworkTopology, reading the weights and biases from the genome.
+    def set_plan(self):
+
+        topology = self.topology
+
+        self.plan_size = topology.size
+        self.plan_identifiers = topology.identifiers
+        self.plan_input_indices = topology.input_indices
+        self.plan_offsets = topology.offsets
+        self.plan_sources = topology.sources
+        self.plan_aggregation_codes = topology.aggregation_codes
+        self.plan_activation_codes  = topology.activation_codes
+        self.plan_aggregation_functions = topology.aggregation_functions
+        self.plan_activation_functions  = topology.activation_functions
+        self.plan_output_positions = topology.output_positions
+        self.plan_is_valid = topology.is_valid
+
+        edges_by_innovation = self.genome.edges_by_innovation
+        nodes_by_identifier = self.genome.nodes_by_identifier
+        self.plan_weights = [edges_by_innovation[innovation].weight for innovation in topology.connection_innovations]
+        self.plan_biases  = [nodes_by_identifier[identifier].bias for identifier in topology.identifiers]
+
+        self.plan_buffers = [[0] * buffer_size for buffer_size in topology.buffer_sizes]
+        self.plan_values = [None] * self.plan_size
+
+        self.plan_steps = list(zip(range(self.plan_size), self.plan_buffers, self.plan_input_indices,
+                                   self.plan_offsets[:-1], self.plan_offsets[1:], self.plan_biases,
+                                   self.plan_aggregation_functions, self.plan_activation_functions))
 
-            node_stack = [] + new_node_stack
-            current_layer += 1
+    def activate(self, inputs):
 
-        change_occurred = True
-        while change_occurred:
-            change_occurred = False
+        if self.compiled:
+            return self.activate_compiled(inputs)
+        return self.activate_nodes(inputs)
 
-            for current_node in self.nodes:
+    def activate_compiled(self, inputs):
 
-                if current_node.layer == None and len(current_node.outputs) > 0:
+        assert len(inputs) == self.num_inputs
+        assert self.plan_is_valid
 
-                    output_layers = [output[0].layer for output in current_node.outputs if output[0].layer is not None]
+        values  = self.plan_values
+        sources = self.plan_sources
+        weights = self.plan_weights
 
-                    if len(output_layers) > 0:
-                        current_node.layer = min(output_layers) - 1
-                        change_occurred = True
+        for position, buffer, input_index, start, end, bias, aggregation_function, activation_function in self.plan_steps:
 
-    def activate(self, inputs):
+            index = 0
+            if input_index >= 0:
+                buffer[0] = inputs[input_index]
+                index = 1
+
+            for connection in range(start, end):
+                buffer[index] = values[sources[connection]] * weights[connection]
+                index += 1
+
+            if bias is not None:
+                buffer[index] = bias
+
+            values[position] = activation_function(aggregation_function(buffer))
+
+        return [None if position < 0 else values[position] for position in self.plan_output_positions]
+
+    # Activates the network on a whole batch of samples at once. inputs is a (num_samples, num_inputs) array, and the
+    # result is a (num_samples, num_outputs) array. Nodes are evaluated in plan order (that is, layer by layer) with the
+    # vectorized functions from functions.py, each over all samples. Outputs of inactive output nodes are NaN.
+    def activate_batch(self, inputs):
+
+        if self.plan_size is None:
+            self.compile()
+
+        inputs = numpy.asarray(inputs, dtype=float)
+        assert inputs.ndim == 2 and inputs.shape[1] == self.num_inputs
+        assert self.plan_is_valid
+
+        num_samples = inputs.shape[0]
+        sources = numpy.array(self.plan_sources, dtype=int)
+        weights = numpy.array(self.plan_weights, dtype=float)
+
+        values = numpy.empty((self.plan_size, num_samples))
+        for position, buffer, input_index, start, end, bias, aggregation_function, activation_function in self.plan_steps:
+
+            aggregation_inputs = numpy.empty((len(buffer), num_samples))
+
+            index = 0
+            if input_index >= 0:
+                aggregation_inputs[0] = inputs[:, input_index]
+                index = 1
+
+            if end > start:
+                numpy.multiply(values[sources[start:end]], weights[start:end, None], out=aggregation_inputs[index:index + end - start])
+                index += end - start
+
+            if bias is not None:
+                aggregation_inputs[index] = bias
+
+            aggregation = vectorized_functions[aggregation_function](aggregation_inputs)
+            values[position] = vectorized_functions[activation_function](aggregation)
+
+        outputs = numpy.full((num_samples, self.num_outputs), numpy.nan)
+        for output_index, position in enumerate(self.plan_output_positions):
+            if position >= 0:
+                outputs[:, output_index] = values[position]
+
+        return outputs
+
+    # Activates the network by propagating values through the Node objects.
+    def activate_nodes(self, inputs):
 
         assert len(inputs) == self.num_inputs
 
@@ -2,17 +2,26 @@ import os
 import sys
 from datetime import *
 import pickle
+from time import perf_counter
+from contextlib import contextmanager
 
 # For use in contexts where this file is imported from outside this directory.
 file_dir = os.path.dirname(__file__)
 sys.path.append(file_dir)
 
 from species import *
+from speciation import *
 from neural_network import *
+from evaluation import *
+from reproduction import *
+from cache import *
+from run_log import *
+from background_io import *
+from random_streams import *
 
 class Population:
 
-    def __init__(self, num_inputs, num_outputs, initial_num_hidden_nodes=0, max_num_hidden_nodes=default_max_num_hidden_nodes, output_activation_function=default_output_activation_function, mode="unconnected", population_size=default_population_size, num_initial_mutations=1, num_generations=None, output_stream_name="sys.stdout"):
+    def __init__(self, num_inputs, num_outputs, initial_num_hidden_nodes=0, max_num_hidden_nodes=default_max_num_hidden_nodes, output_activation_function=default_output_activation_function, mode="unconnected", population_size=default_population_size, num_initial_mutations=1, num_generations=None, output_stream_name="sys.stdout", network_cache_size=default_network_cache_size, fitness_cache_size=None, run_log_name=None, background_writer=None, champion_filename="champion.genome", seed=None):
 
         self.population_size = population_size
         self.num_inputs = num_inputs
@@ -38,15 +47,63 @@ class Population:
 
         self.champion = None
         self.generation_champion = None
+        self.saved_champion = None
+
+        # The champion is saved to this file whenever it changes, unless it is None.
+        self.champion_filename = champion_filename
         self.generation_start_time = None
         self.generation_end_time = None
 
         self.genome_fitnesses = None
 
-        self.initialize()
-        self.initial_mutation()
-        self.set_species()
-        self.set_neural_networks()
+        # If a run log is given, the data of each generation is appended to it (see run_log.py) instead of being kept in
+        # genome_fitnesses. The log is opened when the first generation is logged.
+        self.run_log_name = run_log_name
+        self.run_log = None
+
+        # The time spent in each phase of the current generation, and the functions called with them at the end of each
+        # generation (see add_timing_callback()).
+        self.phase_times = {}
+        self.timing_callbacks = []
+        self.checkpointer = None
+        self.reproducer = None
+
+        # Writes the champion and the run log in the background (see background_io.py).
+        self.background_writer = background_writer
+        if self.background_writer is None and use_background_writer:
+            self.background_writer = get_shared_background_writer()
+
+        # Compiled network topologies, reused across generations by genomes with the same structure.
+        self.network_cache = None
+        if network_cache_size and compile_neural_networks:
+            self.network_cache = NetworkCache(network_cache_size)
+
+        # The index of species representatives used by assign_nearest_species, kept across generations.
+        self.species_index = None
+
+        # Fitnesses of previously evaluated genomes, by content. Only for deterministic evaluation functions.
+        self.fitness_cache = None
+        if fitness_cache_size:
+            self.fitness_cache = FitnessCache(fitness_cache_size)
+        self.num_cached_evaluations = 0
+
+        # If a seed is given, every random choice of the Population is drawn from its own RandomStream (see
+        # random_streams.py), so that seeded runs are reproducible whatever the reproducer. Otherwise, random numbers come
+        # from the global random number generator of the random module.
+        self.random_stream = RandomStream(seed) if seed is not None else None
+
+        # A seeded Population also numbers its innovations, genomes and species from scratch, so that its run does not
+        # depend on what else has been evolved in the process: innovation numbers order the edges of children in
+        # crossover, and species identifiers are part of the keys of random streams. Its numbers are swapped into the
+        # global innovation_tracker while it evolves (see own_innovation_numbers()).
+        self.innovation_tracker_state = innovation_tracker.restarted().get_state() if seed is not None else None
+        self.swapped_innovation_tracker_state = None
+
+        with self.own_innovation_numbers():
+            self.initialize()
+            self.initial_mutation()
+            self.set_species()
+            self.set_neural_networks()
 
     def initialize(self):
 
@@ -64,18 +121,24 @@ class Population:
                                num_outputs=self.num_outputs,
                                num_hidden_nodes=self.initial_num_hidden_nodes,
                                max_num_hidden_nodes=self.max_num_hidden_nodes,
-                               output_activation_function=self.output_activation_function)
+                               output_activation_function=self.output_activation_function,
+                               rng=self.get_rng("genome", i))
             )
 
         self.generation = 1
 
     def initial_mutation(self):
 
+        rngs = [self.get_rng("genome", j) for j in range(len(self.misfits))]
         for i in range(self.num_initial_mutations):
-            for genome in self.misfits:
-                genome.random_mutation()
+            for genome, rng in zip(self.misfits, rngs):
+                genome.random_mutation(rng)
 
-    def run(self, evaluation_function, num_generations=None, fitness_goal=None):
+    # If an evaluator (see evaluation.py) is given, the evaluation function is passed to it instead of being called on
+    # each neural network in turn. Coroutine evaluation functions are run with an AsyncEvaluator by default. If a
+    # Checkpointer (see checkpoint.py) is given, it is called after each generation. If a reproducer (see reproduction.py)
+    # is given, species reproduce through it.
+    def run(self, evaluation_function, num_generations=None, fitness_goal=None, evaluator=None, checkpointer=None, reproducer=None):
 
         if num_generations is None and fitness_goal is None:
             num_generations = self.num_generations
@@ -83,69 +146,220 @@ class Population:
             self.fitness_goal = fitness_goal
         assert not (num_generations is None and fitness_goal is None)
 
-        while (num_generations is None or self.generation <= num_generations) and (fitness_goal is None or (self.champion is None or self.champion.fitness < fitness_goal)):
+        self.checkpointer = checkpointer
+        self.reproducer = reproducer
 
-            # Stuff to do before evaluation.
-            self.pre_evaluation_tasks()
+        with self.own_innovation_numbers():
+            while (num_generations is None or self.generation <= num_generations) and (fitness_goal is None or (self.champion is None or self.champion.fitness < fitness_goal)):
 
-            # Evaluate here.
-            for neural_network in self.neural_networks:
-                neural_network.genome.fitness = evaluation_function(neural_network)
+                # Stuff to do before evaluation.
+                self.pre_evaluation_tasks()
+
+                # Evaluate here.
+                self.evaluate(evaluation_function, evaluator)
 
-            # Stuff to do after evaluation.
-            self.post_evaluation_tasks()
+                # Stuff to do after evaluation.
+                self.post_evaluation_tasks()
 
         return self.champion
 
-    def run_skeleton(self, evaluation_function, num_generations=None, fitness_goal=None):
+    def run_skeleton(self, evaluation_function, num_generations=None, fitness_goal=None, evaluator=None, checkpointer=None, reproducer=None):
 
-        while( self.continue_run(num_generations=num_generations, fitness_goal=fitness_goal) ):
+        self.checkpointer = checkpointer
+        self.reproducer = reproducer
 
-            self.pre_evaluation_tasks()
+        with self.own_innovation_numbers():
+            while( self.continue_run(num_generations=num_generations, fitness_goal=fitness_goal) ):
 
-            for neural_network in self.neural_networks:
-                neural_network.genome.fitness = evaluation_function(neural_network)
+                self.pre_evaluation_tasks()
 
-            self.post_evaluation_tasks()
+                self.evaluate(evaluation_function, evaluator)
+
+                self.post_evaluation_tasks()
 
         return self.champion
 
+    def evaluate(self, evaluation_function, evaluator=None):
+
+        start = perf_counter()
+
+        if evaluator is None and asyncio.iscoroutinefunction(evaluation_function):
+            evaluator = AsyncEvaluator()
+
+        if self.fitness_cache is None:
+            self.evaluate_neural_networks(self.neural_networks, evaluation_function, evaluator)
+
+        else:
+            # Only evaluate one network for each distinct genome which is not in the cache.
+            fingerprints = [neural_network.genome.content_fingerprint() for neural_network in self.neural_networks]
+            fitnesses = {}
+            unevaluated = []
+            for fingerprint, neural_network in zip(fingerprints, self.neural_networks):
+                if fingerprint not in fitnesses:
+                    fitnesses[fingerprint] = self.fitness_cache.get(fingerprint)
+                    if fitnesses[fingerprint] is None:
+                        unevaluated.append((fingerprint, neural_network))
+
+            unevaluated_neural_networks = [neural_network for fingerprint, neural_network in unevaluated]
+            self.evaluate_neural_networks(unevaluated_neural_networks, evaluation_function, evaluator)
+
+            for fingerprint, neural_network in unevaluated:
+                fitnesses[fingerprint] = neural_network.genome.fitness
+                self.fitness_cache.put(fingerprint, neural_network.genome.fitness)
+
+            for fingerprint, neural_network in zip(fingerprints, self.neural_networks):
+                neural_network.genome.fitness = fitnesses[fingerprint]
+
+            self.num_cached_evaluations = len(self.neural_networks) - len(unevaluated_neural_networks)
+
+        self.record_phase_time("evaluate", start)
+
+    def evaluate_neural_networks(self, neural_networks, evaluation_function, evaluator=None):
+
+        if len(neural_networks) == 0:
+            return
+
+        if evaluator is None:
+            for neural_network in neural_networks:
+                neural_network.genome.fitness = evaluation_function(neural_network)
+
+        else:
+            fitnesses = evaluator.evaluate(neural_networks, evaluation_function)
+            for neural_network, fitness in zip(neural_networks, fitnesses):
+                neural_network.genome.fitness = fitness
+
     def pre_evaluation_tasks(self):
 
         if self.output_stream is not None:
             print("Beginning generation {} with {} individuals of {} species.".format(self.generation, len(self.genomes), len(self.species)), file=self.output_stream)
 
         self.generation_start_time = datetime.now()
+        self.phase_times = {}
 
     def post_evaluation_tasks(self):
 
-        self.genome_fitnesses += [[genome.fitness for genome in self.genomes]]
-
+        start = perf_counter()
         self.set_champions()
+        self.record_phase_time("set_champions", start)
 
+        start = perf_counter()
         for species in self.species:
-            species.step_generation()
+            species.step_generation(self.get_rng("species", species.identifier, "representative"))
+        self.record_phase_time("step_generation", start)
 
         self.generation_end_time = datetime.now()
 
+        # The data of the evaluated generation is logged once the timings of the whole generation are known.
+        log_entry = self.get_log_entry()
+
         if self.output_stream is not None:
             self.report_generation()
 
+        start = perf_counter()
         self.remove_stagnated_species()
+        innovation_tracker.step_generation()
+        operator_statistics.step_generation()
         self.reproduce()
         self.transfer_offspring()
+        self.record_phase_time("reproduce", start)
 
+        start = perf_counter()
         self.set_species()
         self.remove_extinct_species()
+        self.record_phase_time("set_species", start)
 
+        start = perf_counter()
         self.set_neural_networks()
+        self.record_phase_time("set_neural_networks", start)
 
-        self.champion.save("champion.genome")
+        # The champion is a copy which is never changed, so it can be saved in the background.
+        start = perf_counter()
+        if self.champion is not self.saved_champion and self.champion_filename is not None:
+            if self.background_writer is not None:
+                self.background_writer.submit(self.champion.save, self.champion_filename)
+            else:
+                self.champion.save(self.champion_filename)
+            self.saved_champion = self.champion
+        self.record_phase_time("save_champion", start)
 
         self.generation += 1
 
+        if self.checkpointer is not None:
+            start = perf_counter()
+            self.checkpointer.checkpoint(self)
+            self.record_phase_time("checkpoint", start)
+
+        self.log_generation(log_entry)
+
+        if self.output_stream is not None:
+            self.report_phase_times()
+
+        for callback in self.timing_callbacks:
+            callback(self, self.phase_times)
+
         return self.champion, self.generation_champion
 
+    # Adds the time since start, a perf_counter() value, to the time of the given phase of the current generation.
+    def record_phase_time(self, phase, start):
+
+        self.phase_times[phase] = self.phase_times.get(phase, 0) + perf_counter() - start
+
+    # Adds a function which is called with the Population and its phase_times at the end of each generation. The phases
+    # are evaluate, set_champions, step_generation, reproduce, set_species, set_neural_networks, save_champion and
+    # checkpoint (only if a Checkpointer is used). Callbacks are not saved with the Population.
+    def add_timing_callback(self, callback):
+
+        self.timing_callbacks.append(callback)
+
+    def remove_timing_callback(self, callback):
+
+        self.timing_callbacks.remove(callback)
+
+    # Returns the metrics of the last generation: the time spent in each of its phases, the mutation operators and
+    # crossovers carried out by its reproduction (and over the whole run), and the hit rates of the caches.
+    def get_metrics(self):
+
+        metrics = {"generation" : self.generation - 1,
+                   "phase_times" : dict(self.phase_times),
+                   "operators" : operator_statistics.generation.as_dict(),
+                   "total_operators" : operator_statistics.total.as_dict()}
+
+        if self.network_cache is not None:
+            metrics["network_cache_hit_rate"] = self.network_cache.hit_rate()
+        if self.fitness_cache is not None:
+            metrics["fitness_cache_hit_rate"] = self.fitness_cache.hit_rate()
+            metrics["num_cached_evaluations"] = self.num_cached_evaluations
+
+        return metrics
+
+    # Returns the data of the evaluated generation for log_generation().
+    def get_log_entry(self):
+
+        return (self.generation,
+                [genome.fitness for genome in self.genomes],
+                [species.identifier for species in self.species],
+                [species.size() for species in self.species],
+                self.generation_champion,
+                self.champion)
+
+    def log_generation(self, log_entry):
+
+        generation, fitnesses, species_identifiers, species_sizes, generation_champion, champion = log_entry
+
+        if self.run_log_name is None:
+            self.genome_fitnesses += [fitnesses]
+            return
+
+        # Generations logged after the one being logged were logged by a run which this one resumes from a checkpoint.
+        if self.run_log is None:
+            self.run_log = RunLog(self.run_log_name, from_generation=generation, background_writer=self.background_writer)
+
+        values = {"generation_time" : sum(self.phase_times.values())}
+        if log_phase_times:
+            values.update(self.phase_times)
+
+        self.run_log.write_generation(generation, fitnesses, species_identifiers, species_sizes, generation_champion, champion, values)
+
     def continue_run(self, num_generations=None, fitness_goal=None):
 
         if num_generations is None and fitness_goal is None:
@@ -160,7 +374,10 @@ class Population:
 
         self.neural_networks.clear()
         for genome in self.genomes:
-            self.neural_networks.append( FeedForwardNeuralNetwork(genome) )
+            if self.network_cache is not None:
+                self.neural_networks.append( self.network_cache.get_neural_network(genome) )
+            else:
+                self.neural_networks.append( FeedForwardNeuralNetwork(genome) )
 
     def report_generation(self):
 
@@ -182,7 +399,14 @@ class Population:
             print(" ({}% of {} goal)".format(round(100 * float(self.champion.fitness) / self.fitness_goal, 2), self.fitness_goal), file=self.output_stream)
         else:
             print()
-        print("Processing time for generation {}: {}s".format(self.generation, round((self.generation_end_time - self.generation_start_time).total_seconds(), 2)), end="\n\n", file=self.output_stream)
+        if self.fitness_cache is not None:
+            print("Fitness cache: {} of {} evaluations skipped ({}% hit rate)".format(self.num_cached_evaluations, len(self.neural_networks), round(100 * self.num_cached_evaluations / max(1, len(self.neural_networks)), 2)), file=self.output_stream)
+        print("Processing time for generation {}: {}s".format(self.generation, round((self.generation_end_time - self.generation_start_time).total_seconds(), 2)), file=self.output_stream)
+
+    def report_phase_times(self):
+
+        phase_times = ", ".join("{} {}s".format(phase, round(seconds, 4)) for phase, seconds in self.phase_times.items())
+        print("Phase times for generation {}: {}".format(self.generation - 1, phase_times), end="\n\n", file=self.output_stream)
 
     def reproduce(self):
 
@@ -205,24 +429,27 @@ class Population:
             elif error < 0:
                 delta = 1
 
-            while error is not 0:
+            while error != 0:
                 max_num_children = max(num_children[species] for species in self.species)
-                most_populated_species = [species for species in self.species if num_children[species] is max_num_children]
+                most_populated_species = [species for species in self.species if num_children[species] == max_num_children]
                 most_populated_species.sort(key=lambda species : species.fitness)
 
                 for i in range(min(abs(error), len(most_populated_species))):
                     species = most_populated_species[i]
                     num_children[species] += delta
                     error += delta
-            assert sum(num_children.values()) == 150, "Number of children requested: {}.".format(sum(num_children.values()))
+            assert sum(num_children.values()) == self.population_size, "Number of children requested: {}.".format(sum(num_children.values()))
 
-            for species in self.species:
-                species.reproduce(num_children[species])
+        else:
+            num_children = {species : int(round((self.population_size * species.average_fitness() / self.total_fitness), 0)) for species in self.species}
+
+        streams = [self.get_random_stream("species", species.identifier) for species in self.species]
 
+        if self.reproducer is None:
+            for species, stream in zip(self.species, streams):
+                species.reproduce(num_children[species], stream)
         else:
-            for species in self.species:
-                num_children = int(round((self.population_size * species.average_fitness() / self.total_fitness), 0))
-                species.reproduce(num_children)
+            self.reproducer.reproduce(self.species, [num_children[species] for species in self.species], streams)
 
     def transfer_offspring(self):
 
@@ -237,13 +464,23 @@ class Population:
 
         self.genomes.sort(key = lambda genome : genome.fitness, reverse = True)
 
-        self.generation_champion = deepcopy(self.genomes[0])
+        self.generation_champion = self.genomes[0].copy()
         if self.champion is None or self.generation_champion.fitness > self.champion.fitness:
             self.champion = self.generation_champion
 
-    # This function may be better with a different method for finding compatible species that ranks them by similarity
+    # Assigns misfits to the first compatible species, or to the most similar one if assign_to_nearest_species is set.
     def set_species(self):
 
+        if assign_to_nearest_species:
+            if self.species_index is None:
+                self.species_index = SpeciesIndex()
+            self.assign_misfits(assign_nearest_species, index=self.species_index, keys=[species.identifier for species in self.species])
+            return
+
+        if vectorize_speciation:
+            self.assign_misfits(assign_species)
+            return
+
         for genome in self.misfits:
 
             compatible_species = ([species for species in self.species if species.is_compatible_with(genome)] + [None])[0]
@@ -258,6 +495,89 @@ class Population:
 
         self.misfits.clear()
 
+    # Adds the misfits to the species given by assignment_function, which is assign_species or assign_nearest_species,
+    # called with the given keyword arguments.
+    def assign_misfits(self, assignment_function, **arguments):
+
+        species_indices, founders = assignment_function(self.misfits, [species.representative for species in self.species], **arguments)
+
+        founders = set(founders)
+        for index in sorted(founders):
+            species = Species(genome=self.misfits[index], current_generation=self.generation)
+            self.species.append(species)
+
+            # The persistent index already holds the founder, which the new species is represented by a copy of.
+            if "index" in arguments:
+                arguments["index"].rename(SpeciesIndex.founder_key(index), species.identifier, species.representative)
+
+        for index, genome in enumerate(self.misfits):
+            if index not in founders:
+                self.species[species_indices[index]].add_genome(genome)
+
+            self.genomes.append(genome)
+
+        self.misfits.clear()
+
+    # Returns the num_genomes fittest genomes of the last evaluated generation.
+    def get_top_genomes(self, num_genomes):
+
+        evaluated_genomes = [genome for species in self.species for genome in species.ancestors]
+        evaluated_genomes.sort(key=lambda genome : genome.fitness, reverse=True)
+
+        return evaluated_genomes[:num_genomes]
+
+    # Replaces random genomes of the next generation with the given ones, such as genomes migrating from another
+    # Population. They are assigned to species like misfits.
+    def add_immigrants(self, genomes):
+
+        rng = self.get_rng("immigrants") or random_module
+        replaced_genomes = rng.sample(self.genomes, min(len(genomes), len(self.genomes)))
+        for genome in replaced_genomes:
+            self.genomes.remove(genome)
+            for species in self.species:
+                if genome in species.genomes:
+                    species.genomes.remove(genome)
+
+        with self.own_innovation_numbers():
+            self.misfits = list(genomes)
+            self.set_species()
+            self.remove_extinct_species()
+
+        self.set_neural_networks()
+
+    # Swaps the innovation numbers of a seeded Population into the global innovation_tracker for the duration of a with
+    # block, and swaps the previous ones back afterwards. Does nothing for Populations which are not seeded, or within
+    # another such block.
+    @contextmanager
+    def own_innovation_numbers(self):
+
+        if self.innovation_tracker_state is None or self.swapped_innovation_tracker_state is not None:
+            yield
+            return
+
+        self.swapped_innovation_tracker_state = innovation_tracker.get_state()
+        innovation_tracker.set_state(self.innovation_tracker_state)
+        try:
+            yield
+        finally:
+            self.innovation_tracker_state = innovation_tracker.get_state()
+            innovation_tracker.set_state(self.swapped_innovation_tracker_state)
+            self.swapped_innovation_tracker_state = None
+
+    # Returns the RandomStream of the current generation with the given keys, or None if the Population is not seeded.
+    def get_random_stream(self, *keys):
+
+        if self.random_stream is None:
+            return None
+
+        return self.random_stream.child(self.generation, *keys)
+
+    # Returns the generator of get_random_stream(*keys), or None if the Population is not seeded.
+    def get_rng(self, *keys):
+
+        stream = self.get_random_stream(*keys)
+        return stream.generator() if stream is not None else None
+
     def set_total_fitness(self):
 
         total_fitness = sum([species.average_fitness() for species in self.species])
@@ -296,42 +616,88 @@ class Population:
 
         return len(self.species)
 
-    def save(self, filename):
-
-        # Output streams are not serializable.
+    # Waits until the champion and run log of every finished generation are written.
+    def flush(self):
 
-        self.output_stream = self.output_stream_name
+        if self.background_writer is not None:
+            self.background_writer.flush()
 
-        file = open(filename, "wb")
-        pickle.dump(self, file, protocol=1)
-        file.close()
+    def save(self, filename):
 
-        self.output_stream = eval(self.output_stream_name)
+        with open(filename, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
 
     @classmethod
     def from_file(cls, filename):
 
-        file = open(filename, "rb")
-        population = pickle.load(file)
-        file.close()
-        
-        population.output_stream = eval(population.output_stream)
-        return population
+        with open(filename, "rb") as file:
+            return pickle.load(file)
+
+    # Output streams, run logs and background writers are not serializable, and neural networks, cached network
+    # topologies and the species index are rebuilt from the genomes rather than saved with them.
+    def __getstate__(self):
+
+        state = self.__dict__.copy()
+        state["output_stream"] = None
+        state["run_log"] = None
+        state["background_writer"] = None
+        state["checkpointer"] = None
+        state["reproducer"] = None
+        state["timing_callbacks"] = []
+        state["neural_networks"] = None
+        state["species_index"] = None
+        if self.swapped_innovation_tracker_state is not None:
+            state["innovation_tracker_state"] = innovation_tracker.get_state()
+            state["swapped_innovation_tracker_state"] = None
+        if self.network_cache is not None:
+            state["network_cache"] = NetworkCache(self.network_cache.max_size)
+        return state
+
+    # Populations saved by older versions lack the attributes added since, which take their default values. They also
+    # saved their neural networks, which are rebuilt like those of any other Population since they are not compiled.
+    def __setstate__(self, state):
+
+        state.setdefault("saved_champion", None)
+        state.setdefault("champion_filename", "champion.genome")
+        state.setdefault("run_log_name", None)
+        state.setdefault("run_log", None)
+        state.setdefault("phase_times", {})
+        state.setdefault("timing_callbacks", [])
+        state.setdefault("checkpointer", None)
+        state.setdefault("reproducer", None)
+        state.setdefault("background_writer", None)
+        state.setdefault("network_cache", NetworkCache(default_network_cache_size) if default_network_cache_size and compile_neural_networks else None)
+        state.setdefault("fitness_cache", None)
+        state.setdefault("species_index", None)
+        state.setdefault("num_cached_evaluations", 0)
+        state.setdefault("random_stream", None)
+        state.setdefault("innovation_tracker_state", None)
+        state.setdefault("swapped_innovation_tracker_state", None)
+
+        self.__dict__.update(state)
+        self.output_stream = eval(self.output_stream_name)
+
+        if use_background_writer:
+            self.background_writer = get_shared_background_writer()
+
+        self.neural_networks = []
+        self.set_neural_networks()
 
     def save_run_data(self, filename="population_{}_gen{}.data"):
 
-        file = open(filename, "wb")
-        pickle.dump(self.genome_fitnesses, file, protocol=1)
-        file.close()
+        with open(filename, "wb") as file:
+            pickle.dump(self.genome_fitnesses, file, protocol=pickle.HIGHEST_PROTOCOL)
 
+    # Returns the fitnesses of every genome of every generation, from either a run log or a file saved by save_run_data().
     @classmethod
     def load_run_data(cls, filename):
 
-        file = open(filename, "rb")
-        run_data = pickle.load(file)
-        file.close()
+        if is_run_log(filename):
+            with RunLogReader(filename) as reader:
+                return reader.genome_fitnesses()
 
-        return run_data
+        with open(filename, "rb") as file:
+            return pickle.load(file)
 
     def __str__(self):
 
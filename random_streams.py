@@ -0,0 +1,29 @@
+from random import Random
+
+# A hierarchy of independent, reproducible streams of random numbers. Each RandomStream is identified by a path of keys
+# starting with a seed, such as (seed, generation, "species", species_identifier, child_index), and its generator() is a
+# random.Random seeded by that path alone. Random numbers therefore do not depend on how many streams were used before,
+# nor on which process uses them, so that a seeded Population evolves identically whether or not its work is spread over
+# several processes.
+#
+# Paths are turned into seeds through their repr(), which the random module hashes with SHA-512, so streams are the same
+# across processes and Python sessions whatever the value of PYTHONHASHSEED.
+class RandomStream:
+
+    def __init__(self, *keys):
+
+        self.keys = keys
+
+    # Returns the stream identified by the path of this stream followed by the given keys.
+    def child(self, *keys):
+
+        return RandomStream(*(self.keys + keys))
+
+    # Returns a new random.Random at the start of the stream.
+    def generator(self):
+
+        return Random(repr(self.keys))
+
+    def __repr__(self):
+
+        return "RandomStream{}".format(self.keys)
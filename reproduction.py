@@ -0,0 +1,110 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from species import *
+
+# Breeds the children of every species in a pool of worker processes, instead of calling Species.reproduce() on each
+# species in turn. It is passed to Population.run or Population.run_skeleton.
+#
+# Elites are kept by the main process. The children left to breed are split into tasks of at most max_task_size
+# children, each of which is sent to a worker with the potential parents and representative of its species, in the
+# compact Genome.encode() encoding. Workers cross over and mutate the parents, and check the compatibility of the
+# children with the representative.
+#
+# Workers number new innovations and genomes with their own innovation_tracker, so the main process renumbers the
+# children in the order in which the serial path creates them: species by species, child by child, and edge by edge.
+# Genome identifiers and innovation numbers are thus the same as if the children had been bred serially. The random
+# numbers are too if the species are given RandomStreams (see random_streams.py), since each child is then bred from its
+# own stream. Otherwise, each task is seeded from the main random number generator.
+class ParallelReproducer:
+
+    def __init__(self, num_workers=None, max_task_size=default_max_reproduction_task_size):
+
+        self.num_workers = num_workers
+        self.max_task_size = max_task_size
+
+        self.executor = None
+
+    # Reproduces each species with the matching number of children, and RandomStream if streams are given.
+    def reproduce(self, species_list, num_children_list, streams=None):
+
+        if streams is None:
+            streams = [None] * len(species_list)
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.num_workers)
+
+        task_species = []
+        tasks = []
+        for species, num_children, stream in zip(species_list, num_children_list, streams):
+
+            num_bred_children = species.add_elites(num_children)
+            if num_bred_children == 0:
+                continue
+
+            parent_encodings = [genome.encode() for genome in species.get_potential_parents()]
+            representative_encoding = species.representative.encode()
+            for start in range(0, num_bred_children, self.max_task_size):
+                task_species.append(species)
+                seed_value = getrandbits(64) if stream is None else None
+                tasks.append((seed_value, stream, start, parent_encodings, representative_encoding, min(self.max_task_size, num_bred_children - start)))
+
+        for species, (child_encodings, compatibilities, counters) in zip(task_species, self.executor.map(breed_encoded_species, tasks)):
+
+            for encoding, is_compatible in zip(child_encodings, compatibilities):
+                species.add_offspring(ParallelReproducer.renumber(Genome.decode(encoding)), is_compatible)
+
+            if record_operator_statistics:
+                operator_statistics.merge(counters)
+
+        for species, num_children in zip(species_list, num_children_list):
+            assert (len(species.genomes) + len(species.misfits)) == num_children
+
+    # Gives a child bred by a worker its identifier and innovation numbers from the main innovation_tracker. New edges
+    # come after the edges inherited from the parents, in the order in which they were created.
+    @classmethod
+    def renumber(cls, genome):
+
+        genome.set_identifier()
+        for edge in genome.edges:
+            edge.set_innovation_number()
+
+        return genome
+
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+        self.executor = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# The task of a worker process of a ParallelReproducer. Returns the encodings of the children, whether each one is
+# compatible with the representative of its species, and the OperatorCounters of the task.
+def breed_encoded_species(task):
+
+    seed_value, stream, first_child_index, parent_encodings, representative_encoding, num_children = task
+
+    if seed_value is not None:
+        seed(seed_value)
+    operator_statistics.reset()
+
+    potential_parents = [Genome.decode(encoding) for encoding in parent_encodings]
+    representative = Genome.decode(representative_encoding)
+
+    children = Species.breed(potential_parents, num_children, stream, first_child_index)
+    compatibilities = [Genome.similarity(representative, child) >= species_similarity_threshold for child in children]
+
+    return [child.encode() for child in children], compatibilities, operator_statistics.generation
@@ -0,0 +1,216 @@
+import os
+import sys
+import struct
+import mmap
+import numpy
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+# An append-only log of the data of a run, written one generation at a time, so that memory use does not grow with the
+# number of generations and a crashed run keeps every generation it completed. A file starts with a magic and a format
+# version, followed by one record per generation:
+#
+#   record length       of the rest of the record
+#   header              generation, number of genomes, number of species, generation champion identifier, champion
+#                       identifier, champion fitness, number of named values
+#   fitnesses           of every genome, as doubles
+#   species             identifier and size of every species, as unsigned 32-bit integers
+#   named values        name length, name and value (a double) of each value, such as the timings of the generation
+#
+# All numbers are little-endian. A record cut short by a crash is ignored by the reader, and overwritten when the log is
+# opened again.
+
+run_log_magic = b"NEATRLOG"
+run_log_version = 1
+
+run_log_header = struct.Struct("<8sH")
+run_log_record_length = struct.Struct("<I")
+run_log_record_header = struct.Struct("<QIIQQdH")
+run_log_value_name_length = struct.Struct("<B")
+run_log_value = struct.Struct("<d")
+
+class RunLog:
+
+    # Opens the log for appending. Records of generation from_generation onwards, and any incomplete record, are
+    # removed first, so that a run resumed from a checkpoint does not log its generations twice. If a BackgroundWriter
+    # (see background_io.py) is given, records are appended to the file by it.
+    def __init__(self, filename, from_generation=None, background_writer=None):
+
+        self.filename = filename
+        self.background_writer = background_writer
+
+        valid_length = 0
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with RunLogReader(filename) as reader:
+                valid_length = reader.data_end
+                for offset in reader.offsets:
+                    if from_generation is not None and reader.read_generation(offset) >= from_generation:
+                        valid_length = offset
+                        break
+
+        if valid_length == 0:
+            self.file = open(filename, "wb")
+            self.file.write(run_log_header.pack(run_log_magic, run_log_version))
+        else:
+            self.file = open(filename, "r+b")
+            self.file.truncate(valid_length)
+            self.file.seek(valid_length)
+
+        self.file.flush()
+
+    def write_generation(self, generation, fitnesses, species_identifiers, species_sizes, generation_champion, champion, values=None):
+
+        if values is None:
+            values = {}
+
+        fitnesses = numpy.asarray(fitnesses, dtype="<f8")
+        species = numpy.empty((len(species_identifiers), 2), dtype="<u4")
+        species[:, 0] = species_identifiers
+        species[:, 1] = species_sizes
+
+        parts = [run_log_record_header.pack(generation, len(fitnesses), len(species), generation_champion.identifier, champion.identifier, champion.fitness, len(values)),
+                 fitnesses.tobytes(),
+                 species.tobytes()]
+        for name, value in values.items():
+            encoded_name = name.encode("utf-8")
+            parts.append(run_log_value_name_length.pack(len(encoded_name)) + encoded_name + run_log_value.pack(value))
+
+        record = b"".join(parts)
+        record = run_log_record_length.pack(len(record)) + record
+
+        if self.background_writer is not None:
+            self.background_writer.submit(self.append, record)
+        else:
+            self.append(record)
+
+    def append(self, record):
+
+        self.file.write(record)
+        self.file.flush()
+
+    def close(self):
+
+        if self.background_writer is not None:
+            self.background_writer.flush()
+
+        self.file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+# The data of one generation of a RunLog. The arrays are read-only views into the memory map of the log, which stays
+# open until they are no longer used, even if the reader is closed.
+class GenerationRecord:
+
+    def __init__(self, generation, fitnesses, species_identifiers, species_sizes, generation_champion_identifier, champion_identifier, champion_fitness, values):
+
+        self.generation = generation
+        self.fitnesses = fitnesses
+        self.species_identifiers = species_identifiers
+        self.species_sizes = species_sizes
+        self.generation_champion_identifier = generation_champion_identifier
+        self.champion_identifier = champion_identifier
+        self.champion_fitness = champion_fitness
+        self.values = values
+
+    def __str__(self):
+
+        return "Generation {}: {} genomes, {} species, champion {} with fitness {}".format(self.generation, len(self.fitnesses), len(self.species_identifiers), self.champion_identifier, self.champion_fitness)
+
+# Reads a RunLog through a memory map. Records are decoded when they are accessed.
+class RunLogReader:
+
+    def __init__(self, filename):
+
+        self.file = open(filename, "rb")
+        self.memory_map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = run_log_header.unpack_from(self.memory_map, 0)
+        assert magic == run_log_magic, "Not a run log."
+        assert version == run_log_version, "Unsupported run log version {}.".format(version)
+
+        # The offsets of the complete records, and the end of the last one.
+        self.offsets = []
+        offset = run_log_header.size
+        while offset + run_log_record_length.size <= len(self.memory_map):
+            length, = run_log_record_length.unpack_from(self.memory_map, offset)
+            if offset + run_log_record_length.size + length > len(self.memory_map):
+                break
+            self.offsets.append(offset)
+            offset += run_log_record_length.size + length
+        self.data_end = offset
+
+    def __len__(self):
+
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+
+        return self.read_record(self.offsets[index])
+
+    def __iter__(self):
+
+        for offset in self.offsets:
+            yield self.read_record(offset)
+
+    def read_generation(self, offset):
+
+        return run_log_record_header.unpack_from(self.memory_map, offset + run_log_record_length.size)[0]
+
+    def read_record(self, offset):
+
+        offset += run_log_record_length.size
+        generation, num_genomes, num_species, generation_champion_identifier, champion_identifier, champion_fitness, num_values = run_log_record_header.unpack_from(self.memory_map, offset)
+        offset += run_log_record_header.size
+
+        fitnesses = numpy.frombuffer(self.memory_map, dtype="<f8", count=num_genomes, offset=offset)
+        offset += fitnesses.nbytes
+
+        species = numpy.frombuffer(self.memory_map, dtype="<u4", count=2 * num_species, offset=offset).reshape((num_species, 2))
+        offset += species.nbytes
+
+        values = {}
+        for i in range(num_values):
+            name_length, = run_log_value_name_length.unpack_from(self.memory_map, offset)
+            offset += run_log_value_name_length.size
+            name = self.memory_map[offset:offset + name_length].decode("utf-8")
+            offset += name_length
+            values[name], = run_log_value.unpack_from(self.memory_map, offset)
+            offset += run_log_value.size
+
+        return GenerationRecord(generation, fitnesses, species[:, 0], species[:, 1], generation_champion_identifier, champion_identifier, champion_fitness, values)
+
+    # The fitnesses of every generation, in the form of Population.genome_fitnesses.
+    def genome_fitnesses(self):
+
+        return [record.fitnesses.tolist() for record in self]
+
+    def close(self):
+
+        # The memory map cannot be closed while records still refer to it; it is then closed once they are freed.
+        try:
+            self.memory_map.close()
+        except BufferError:
+            pass
+        self.memory_map = None
+        self.file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+def is_run_log(filename):
+
+    with open(filename, "rb") as file:
+        return file.read(len(run_log_magic)) == run_log_magic
@@ -0,0 +1,276 @@
+import os
+import sys
+import struct
+import mmap
+import json
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from genome import *
+from background_io import *
+
+# A compact, versioned binary format for genomes, which does not depend on pickle or on the classes of genome.py, and
+# round-trips genomes exactly. A file holds any number of genomes:
+#
+#   header          magic, format version, number of genomes
+#   function table  the full names (see functions.full_function_names) of the functions coded by index in the nodes
+#   offset table    the offset of each genome in the file, so that any genome can be read without reading the others
+#   genomes         a genome header followed by its node and edge records
+#
+# All numbers are little-endian. Node and edge identifiers and innovation numbers are stored as unsigned 32-bit integers,
+# unless one of those of a genome does not fit, in which case all of them are stored as unsigned 64-bit integers, as are
+# genome identifiers. This happens with the paired innovation numbers of islands (see
+# InnovationTracker.use_distributed_numbering), which grow with the square of the node identifiers. Weights, biases and
+# fitnesses are stored as doubles, so they are exactly preserved. Version 1 files, which only had 32-bit records, are
+# still read.
+#
+# Genomes can also be stored as JSON, with functions by name.
+
+genome_file_magic = b"NEATGENO"
+genome_file_version = 2
+supported_genome_file_versions = (1, 2)
+
+genome_file_header = struct.Struct("<8sHI")
+genome_record_header = struct.Struct("<QIIIdBII")
+node_record = struct.Struct("<IBBdB")
+edge_record = struct.Struct("<IIIIdB")
+wide_node_record = struct.Struct("<QBBdB")
+wide_edge_record = struct.Struct("<QQQQdB")
+
+max_narrow_number = 2**32 - 1
+
+# Flags of genome and node records.
+genome_has_fitness = 1
+genome_has_max_num_hidden_nodes = 2
+genome_has_wide_records = 4
+node_has_bias = 1
+node_is_input = 2
+node_is_output = 4
+node_is_enabled = 8
+
+# Genomes pickled by old versions of genome.py may store functions by name.
+def get_function_name(function):
+
+    if isinstance(function, str):
+        assert function in functions_by_name, "Unknown function {}.".format(function)
+        return function
+
+    return full_function_names[function]
+
+def genomes_to_bytes(genomes):
+
+    function_codes = {}
+    for genome in genomes:
+        for node in genome.nodes:
+            for function in [node.aggregation_function, node.activation_function]:
+                function_codes.setdefault(get_function_name(function), len(function_codes))
+
+    function_table = bytearray([len(function_codes)])
+    for name in function_codes:
+        encoded_name = name.encode("utf-8")
+        function_table += bytes([len(encoded_name)]) + encoded_name
+
+    records = [genome_to_bytes(genome, function_codes) for genome in genomes]
+
+    offset = genome_file_header.size + len(function_table) + 8 * len(records)
+    offsets = []
+    for record in records:
+        offsets.append(offset)
+        offset += len(record)
+
+    return b"".join([genome_file_header.pack(genome_file_magic, genome_file_version, len(records)), bytes(function_table), struct.pack("<{}Q".format(len(offsets)), *offsets)] + records)
+
+def genome_to_bytes(genome, function_codes):
+
+    flags = 0
+    if genome.fitness is not None:
+        flags |= genome_has_fitness
+    if genome.max_num_hidden_nodes is not None:
+        flags |= genome_has_max_num_hidden_nodes
+
+    numbers = [node.identifier for node in genome.nodes] + [max(edge.identifier, edge.innovation_number, edge.input_node_identifier, edge.output_node_identifier) for edge in genome.edges]
+    node_format, edge_format = node_record, edge_record
+    if len(numbers) > 0 and max(numbers) > max_narrow_number:
+        flags |= genome_has_wide_records
+        node_format, edge_format = wide_node_record, wide_edge_record
+
+    parts = [genome_record_header.pack(genome.identifier, genome.num_inputs, genome.num_outputs,
+                                       genome.max_num_hidden_nodes if genome.max_num_hidden_nodes is not None else 0,
+                                       genome.fitness if genome.fitness is not None else 0.0,
+                                       flags, len(genome.nodes), len(genome.edges))]
+
+    for node in genome.nodes:
+        flags = (node_has_bias if node.bias is not None else 0) | (node_is_input if node.is_input_node else 0) | (node_is_output if node.is_output_node else 0) | (node_is_enabled if node.is_enabled else 0)
+        parts.append(node_format.pack(node.identifier, function_codes[get_function_name(node.aggregation_function)], function_codes[get_function_name(node.activation_function)], node.bias if node.bias is not None else 0.0, flags))
+
+    for edge in genome.edges:
+        parts.append(edge_format.pack(edge.identifier, edge.innovation_number, edge.input_node_identifier, edge.output_node_identifier, edge.weight, edge.is_enabled))
+
+    return b"".join(parts)
+
+# Reads the genomes of the binary format from a bytes-like object, such as a memory map of a genome file. Genomes are
+# decoded when they are accessed.
+class GenomeReader:
+
+    def __init__(self, buffer):
+
+        self.buffer = buffer
+
+        magic, version, self.num_genomes = genome_file_header.unpack_from(buffer, 0)
+        assert magic == genome_file_magic, "Not a genome file."
+        assert version in supported_genome_file_versions, "Unsupported genome file version {}.".format(version)
+
+        position = genome_file_header.size
+        self.functions = []
+        for i in range(buffer[position]):
+            length = buffer[position + 1]
+            name = bytes(buffer[position + 2:position + 2 + length]).decode("utf-8")
+            self.functions.append(functions_by_name[name])
+            position += 1 + length
+        position += 1
+
+        self.offsets = struct.unpack_from("<{}Q".format(self.num_genomes), buffer, position)
+
+    def __len__(self):
+
+        return self.num_genomes
+
+    def __getitem__(self, index):
+
+        return self.read_genome(self.offsets[index])
+
+    def __iter__(self):
+
+        for offset in self.offsets:
+            yield self.read_genome(offset)
+
+    # Genes and genomes are built from their states, as when they are unpickled, so that no identifiers, innovation
+    # numbers or random biases are generated for them.
+    def read_genome(self, offset):
+
+        identifier, num_inputs, num_outputs, max_num_hidden_nodes, fitness, flags, num_nodes, num_edges = genome_record_header.unpack_from(self.buffer, offset)
+        offset += genome_record_header.size
+
+        node_format, edge_format = (wide_node_record, wide_edge_record) if flags & genome_has_wide_records else (node_record, edge_record)
+
+        nodes = []
+        for node_identifier, aggregation_code, activation_code, bias, node_flags in node_format.iter_unpack(self.buffer[offset:offset + num_nodes * node_format.size]):
+            node = NodeGene.__new__(NodeGene)
+            node.__setstate__((node_identifier, self.functions[aggregation_code], self.functions[activation_code], bool(node_flags & node_is_input), bool(node_flags & node_is_output), bool(node_flags & node_is_enabled), bias if node_flags & node_has_bias else None))
+            nodes.append(node)
+        offset += num_nodes * node_format.size
+
+        edges = []
+        for edge_state in edge_format.iter_unpack(self.buffer[offset:offset + num_edges * edge_format.size]):
+            edge = EdgeGene.__new__(EdgeGene)
+            edge.__setstate__(edge_state[:5] + (bool(edge_state[5]),))
+            edges.append(edge)
+
+        genome = Genome.__new__(Genome)
+        genome.__setstate__({"identifier" : identifier,
+                             "num_inputs" : num_inputs,
+                             "num_outputs" : num_outputs,
+                             "max_num_hidden_nodes" : max_num_hidden_nodes if flags & genome_has_max_num_hidden_nodes else None,
+                             "nodes" : nodes,
+                             "edges" : edges,
+                             "fitness" : fitness if flags & genome_has_fitness else None})
+        return genome
+
+# A genome file opened through a memory map, so that only the genomes which are accessed are read from disk.
+class GenomeFile(GenomeReader):
+
+    def __init__(self, filename):
+
+        self.file = open(filename, "rb")
+        self.memory_map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        GenomeReader.__init__(self, memoryview(self.memory_map))
+
+    def close(self):
+
+        self.buffer.release()
+        self.memory_map.close()
+        self.file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+
+        self.close()
+
+def is_genome_file(filename):
+
+    with open(filename, "rb") as file:
+        return file.read(len(genome_file_magic)) == genome_file_magic
+
+# Files are replaced atomically, so that an interrupted save leaves the previous file in place.
+def save_genomes(genomes, filename):
+
+    write_file_atomically(filename, genomes_to_bytes(genomes))
+
+def load_genomes(filename):
+
+    with GenomeFile(filename) as genome_file:
+        return list(genome_file)
+
+def genome_to_json(genome):
+
+    return {"format" : "neat-genome",
+            "version" : genome_file_version,
+            "identifier" : genome.identifier,
+            "num_inputs" : genome.num_inputs,
+            "num_outputs" : genome.num_outputs,
+            "max_num_hidden_nodes" : genome.max_num_hidden_nodes,
+            "fitness" : genome.fitness,
+            "nodes" : [{"identifier" : node.identifier,
+                        "aggregation_function" : get_function_name(node.aggregation_function),
+                        "activation_function" : get_function_name(node.activation_function),
+                        "bias" : node.bias,
+                        "is_input_node" : node.is_input_node,
+                        "is_output_node" : node.is_output_node,
+                        "is_enabled" : node.is_enabled} for node in genome.nodes],
+            "edges" : [{"identifier" : edge.identifier,
+                        "innovation_number" : edge.innovation_number,
+                        "input_node_identifier" : edge.input_node_identifier,
+                        "output_node_identifier" : edge.output_node_identifier,
+                        "weight" : edge.weight,
+                        "is_enabled" : edge.is_enabled} for edge in genome.edges]}
+
+def genome_from_json(representation):
+
+    assert representation.get("format") == "neat-genome", "Not a genome."
+    assert representation["version"] in supported_genome_file_versions, "Unsupported genome version {}.".format(representation["version"])
+
+    nodes = []
+    for node_representation in representation["nodes"]:
+        node = NodeGene.__new__(NodeGene)
+        node.__setstate__(dict(node_representation, aggregation_function=functions_by_name[node_representation["aggregation_function"]], activation_function=functions_by_name[node_representation["activation_function"]]))
+        nodes.append(node)
+
+    edges = []
+    for edge_representation in representation["edges"]:
+        edge = EdgeGene.__new__(EdgeGene)
+        edge.__setstate__(edge_representation)
+        edges.append(edge)
+
+    genome = Genome.__new__(Genome)
+    genome.__setstate__({"identifier" : representation["identifier"],
+                         "num_inputs" : representation["num_inputs"],
+                         "num_outputs" : representation["num_outputs"],
+                         "max_num_hidden_nodes" : representation["max_num_hidden_nodes"],
+                         "nodes" : nodes,
+                         "edges" : edges,
+                         "fitness" : representation["fitness"]})
+    return genome
+
+def save_genome_json(genome, filename):
+
+    write_file_atomically(filename, json.dumps(genome_to_json(genome)).encode())
+
+def load_genome_json(filename):
+
+    with open(filename, "r") as file:
+        return genome_from_json(json.load(file))
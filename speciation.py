@@ -0,0 +1,310 @@
+import os
+import sys
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from species import *
+
+# Batched versions of Genome.similarity and of the assignment of genomes to the first compatible species. Each genome is
+# encoded as a 0/1 row over the (node identifier, is enabled) and (innovation, is enabled) features it has, so that the
+# sizes of the intersections of all pairs of feature sets are a single matrix product. Only the features of the genomes
+# being compared against are encoded, since no other feature can be in an intersection.
+#
+# The similarities are computed with the same floating point operations, in the same order, as Genome.similarity, so
+# both give the same species.
+
+def node_features(genome):
+
+    return set((node.identifier, node.is_enabled) for node in genome.nodes)
+
+def edge_features(genome):
+
+    return set((edge.innovation, edge.is_enabled) for edge in genome.edges)
+
+# Returns a (len(feature_sets), len(columns)) 0/1 matrix of the given feature sets over the given feature columns.
+def feature_matrix(feature_sets, columns):
+
+    matrix = numpy.zeros((len(feature_sets), len(columns)))
+    for row, features in enumerate(feature_sets):
+        for feature in features:
+            column = columns.get(feature)
+            if column is not None:
+                matrix[row, column] = 1
+
+    return matrix
+
+# Returns the number of shared features of every pair of the given feature sets.
+def intersection_sizes(feature_sets1, feature_sets2):
+
+    columns = {}
+    for features in feature_sets2:
+        for feature in features:
+            columns.setdefault(feature, len(columns))
+
+    return feature_matrix(feature_sets1, columns) @ feature_matrix(feature_sets2, columns).T
+
+# Returns the (len(genomes1), len(genomes2)) matrix of Genome.similarity for every pair of the given genomes.
+def similarity_matrix(genomes1, genomes2):
+
+    node_intersections = intersection_sizes([node_features(genome) for genome in genomes1], [node_features(genome) for genome in genomes2])
+    edge_intersections = intersection_sizes([edge_features(genome) for genome in genomes1], [edge_features(genome) for genome in genomes2])
+
+    num_nodes1 = numpy.array([len(genome.nodes) for genome in genomes1], dtype=float)
+    num_nodes2 = numpy.array([len(genome.nodes) for genome in genomes2], dtype=float)
+    num_edges1 = numpy.array([len(genome.edges) for genome in genomes1], dtype=float)
+    num_edges2 = numpy.array([len(genome.edges) for genome in genomes2], dtype=float)
+
+    numerator = node_gene_similarity_measure * node_intersections + edge_gene_similarity_measure * edge_intersections
+    denominator = node_gene_similarity_measure * numpy.maximum.outer(num_nodes1, num_nodes2) + edge_gene_similarity_measure * numpy.maximum.outer(num_edges1, num_edges2)
+    denominator[denominator == 0] = 1
+
+    return numerator / denominator
+
+# Assigns each of the given genomes, in order, to the first species whose representative it is compatible with. A genome
+# which is compatible with none of them founds a new species, which is compared against after the existing ones. Returns
+# the index of the species of each genome, where the species founded by the genome at index i of the genomes has the
+# index len(representatives) + (number of new species founded before it), along with the list of those founders.
+#
+# Genomes without an existing species are compared against the founders of the new species in blocks of block_size
+# genomes, so that the similarity matrices have at most block_size rows, whatever the number of genomes.
+def assign_species(genomes, representatives, block_size=speciation_block_size):
+
+    species_indices = [None] * len(genomes)
+    unassigned = []
+
+    if len(representatives) > 0 and len(genomes) > 0:
+        compatible = similarity_matrix(genomes, representatives) >= species_similarity_threshold
+        has_compatible = compatible.any(axis=1)
+        first_compatible = compatible.argmax(axis=1)
+        for index in range(len(genomes)):
+            if has_compatible[index]:
+                species_indices[index] = int(first_compatible[index])
+            else:
+                unassigned.append(index)
+    else:
+        unassigned = list(range(len(genomes)))
+
+    # Each block is compared against the founders of the previous blocks, and against itself for the founders it holds.
+    founders = []
+    for block_start in range(0, len(unassigned), block_size):
+
+        block = unassigned[block_start:block_start + block_size]
+        block_genomes = [genomes[index] for index in block]
+
+        num_previous_founders = len(founders)
+        if num_previous_founders > 0:
+            compatible_previous = similarity_matrix(block_genomes, [genomes[index] for index in founders]) >= species_similarity_threshold
+        compatible_block = similarity_matrix(block_genomes, block_genomes) >= species_similarity_threshold
+
+        founder_positions = []
+        for position, index in enumerate(block):
+
+            new_species = None
+            if num_previous_founders > 0 and compatible_previous[position].any():
+                new_species = int(compatible_previous[position].argmax())
+            else:
+                for number, founder_position in enumerate(founder_positions):
+                    if compatible_block[position, founder_position]:
+                        new_species = num_previous_founders + number
+                        break
+
+            if new_species is None:
+                new_species = len(founders)
+                founder_positions.append(position)
+                founders.append(index)
+
+            species_indices[index] = len(representatives) + new_species
+
+    return species_indices, founders
+
+# Finds candidate species for a genome among the representatives of all species without comparing against each of
+# them. Representatives are indexed by MinHash signatures of their node and edge features, split into bands of
+# band_size hashes. Genomes whose features overlap strongly are likely to agree on every hash of at least one band, so
+# the species sharing a band with a genome are its candidates. The hash functions come from their own seeded generator,
+# so building an index does not change the random numbers drawn by the rest of the algorithm.
+#
+# The index is meant to persist across generations: each representative is indexed under the key of its species, and
+# synchronize() only hashes the representatives which changed since the last generation, and drops removed species.
+class SpeciesIndex:
+
+    prime = 2**31 - 1
+
+    def __init__(self, num_bands=species_index_num_bands, band_size=species_index_band_size, seed=0):
+
+        self.num_bands = num_bands
+        self.band_size = band_size
+
+        generator = numpy.random.default_rng(seed)
+        num_hashes = num_bands * band_size
+        self.multipliers = generator.integers(1, SpeciesIndex.prime, size=num_hashes, dtype=numpy.int64)[:, None]
+        self.offsets = generator.integers(0, SpeciesIndex.prime, size=num_hashes, dtype=numpy.int64)[:, None]
+
+        self.buckets = [{} for band in range(num_bands)]
+
+        # The genome, band keys and similarity profile indexed under each key.
+        self.entries = {}
+
+    # Features are tuples of integers and booleans, whose hashes do not depend on the hash seed of the interpreter.
+    def signature(self, profile):
+
+        node_features, edge_features, num_nodes, num_edges = profile
+        features = [(0,) + feature for feature in node_features] + [(1,) + feature for feature in edge_features]
+        if len(features) == 0:
+            return None
+
+        values = numpy.array([hash(feature) % SpeciesIndex.prime for feature in features], dtype=numpy.int64)[None, :]
+        return ((self.multipliers * values + self.offsets) % SpeciesIndex.prime).min(axis=1)
+
+    def band_keys(self, profile):
+
+        signature = self.signature(profile)
+        if signature is None:
+            return []
+
+        return [signature[band * self.band_size:(band + 1) * self.band_size].tobytes() for band in range(self.num_bands)]
+
+    # Indexes the genome under the given key, replacing the genome previously indexed under it, if any.
+    def add(self, key, genome):
+
+        if key in self.entries:
+            self.remove(key)
+
+        profile = similarity_profile(genome)
+        band_keys = self.band_keys(profile)
+        for bucket, band_key in zip(self.buckets, band_keys):
+            bucket.setdefault(band_key, set()).add(key)
+
+        self.entries[key] = (genome, band_keys, profile)
+
+    def remove(self, key):
+
+        genome, band_keys, profile = self.entries.pop(key)
+        for bucket, band_key in zip(self.buckets, band_keys):
+            bucket[band_key].discard(key)
+            if len(bucket[band_key]) == 0:
+                del bucket[band_key]
+
+    # Moves the entry of old_key to new_key, for an equal genome, without hashing it again.
+    def rename(self, old_key, new_key, genome):
+
+        old_genome, band_keys, profile = self.entries[old_key]
+        self.remove(old_key)
+        if new_key in self.entries:
+            self.remove(new_key)
+
+        for bucket, band_key in zip(self.buckets, band_keys):
+            bucket.setdefault(band_key, set()).add(new_key)
+        self.entries[new_key] = (genome, band_keys, profile)
+
+    # Makes the index hold exactly the given genomes under the given keys, indexing only those it does not already hold.
+    def synchronize(self, keys, genomes):
+
+        for key in set(self.entries).difference(keys):
+            self.remove(key)
+
+        for key, genome in zip(keys, genomes):
+            if key not in self.entries or self.entries[key][0] is not genome:
+                self.add(key, genome)
+
+    def profile(self, key):
+
+        return self.entries[key][2]
+
+    # Returns the keys of the genomes sharing at least one band with the genome of the given profile.
+    def candidates(self, profile):
+
+        candidates = set()
+        for bucket, band_key in zip(self.buckets, self.band_keys(profile)):
+            candidates.update(bucket.get(band_key, ()))
+
+        return candidates
+
+    # The key under which assign_nearest_species() indexes the genome at the given position, when it founds a species.
+    @classmethod
+    def founder_key(cls, genome_index):
+
+        return ("founder", genome_index)
+
+# The node features, edge features, number of nodes and number of edges of a genome, from which feature_similarity()
+# computes the same similarity as Genome.similarity.
+def similarity_profile(genome):
+
+    return node_features(genome), edge_features(genome), len(genome.nodes), len(genome.edges)
+
+def feature_similarity(profile1, profile2):
+
+    node_features1, edge_features1, num_nodes1, num_edges1 = profile1
+    node_features2, edge_features2, num_nodes2, num_edges2 = profile2
+
+    numerator   = 0
+    denominator = 0
+
+    numerator += node_gene_similarity_measure * len(node_features1 & node_features2)
+    denominator += node_gene_similarity_measure * max(num_nodes1, num_nodes2)
+
+    numerator += edge_gene_similarity_measure * len(edge_features1 & edge_features2)
+    denominator += edge_gene_similarity_measure * max(num_edges1, num_edges2)
+
+    if denominator == 0:
+        denominator = 1
+
+    return numerator / denominator
+
+# Like assign_species, but assigns each genome to the compatible species whose representative it is most similar to, so
+# that the assignment to existing species does not depend on their order. Ties go to the species with the lowest index.
+# Only the candidates from a SpeciesIndex are compared against, so a lookup does not grow with the number of species.
+# The nearest species is therefore the nearest candidate, which is almost always, but not certainly, the nearest of all.
+#
+# A genome which is compatible with a species but shares no band with its representative is missed, and founds a species
+# of its own. With the default bands and threshold, this happens for at most about 2% of the pairs at the threshold,
+# and far less often for more similar ones. If full_scan is set, genomes without a compatible candidate,
+# including every founder, are compared against every species instead, so that a genome only founds a species if it is
+# compatible with none. This costs as much as comparing against every species when many species are founded.
+#
+# If a persistent index is given, the representatives are indexed under the given keys (by default, their positions),
+# and founders under SpeciesIndex.founder_key() of their position in genomes.
+def assign_nearest_species(genomes, representatives, index=None, keys=None, full_scan=species_index_full_scan):
+
+    if index is None:
+        index = SpeciesIndex()
+    if keys is None:
+        keys = list(range(len(representatives)))
+
+    index.synchronize(keys, representatives)
+    positions = {key : position for position, key in enumerate(keys)}
+    profiles = [index.profile(key) for key in keys]
+
+    species_indices = []
+    founders = []
+    for genome_index, genome in enumerate(genomes):
+
+        profile = similarity_profile(genome)
+
+        candidate_lists = [sorted(positions[key] for key in index.candidates(profile))]
+        if full_scan:
+            candidate_lists.append(range(len(profiles)))
+
+        species_index = None
+        for candidates in candidate_lists:
+            best_similarity = species_similarity_threshold
+            for candidate in candidates:
+                similarity = feature_similarity(profiles[candidate], profile)
+                if similarity >= best_similarity and (species_index is None or similarity > best_similarity):
+                    species_index = candidate
+                    best_similarity = similarity
+            if species_index is not None:
+                break
+
+        if species_index is None:
+            species_index = len(profiles)
+            key = SpeciesIndex.founder_key(genome_index)
+            index.add(key, genome)
+            positions[key] = species_index
+            profiles.append(profile)
+            founders.append(genome_index)
+
+        species_indices.append(species_index)
+
+    return species_indices, founders
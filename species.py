@@ -24,18 +24,17 @@ class Species:
 
         self.fitness_history = []
         self.fitness = None
-        self.champion = deepcopy(genome)
-        self.representative = deepcopy(genome)
+        self.champion = genome.copy()
+        self.representative = genome.copy()
         self.genomes.append(genome)
         self.age = 0
 
     def set_identifier(self):
 
-        self.identifier = max(global_species_identifiers) + 1
-        global_species_identifiers.append(self.identifier)
+        self.identifier = innovation_tracker.get_species_identifier()
 
     # This function assumes that all genomes have been evaluated.
-    def step_generation(self):
+    def step_generation(self, rng=None):
 
         assert len(self.genomes) > 0
 
@@ -43,7 +42,7 @@ class Species:
         self.genomes.sort(key = lambda genome : genome.fitness, reverse = True)
 
         if (self.champion.fitness is None or self.genomes[0].fitness >= self.champion.fitness):
-            self.champion = deepcopy(self.genomes[0])
+            self.champion = self.genomes[0].copy()
 
         self.fitness = max([genome.fitness for genome in self.genomes])
         self.fitness_history.append(self.fitness)
@@ -52,40 +51,68 @@ class Species:
         self.ancestors = self.genomes.copy()
 
         # Choose a random representative from the previous generation
-        self.representative = choice(self.ancestors)
+        self.representative = (rng or random_module).choice(self.ancestors)
 
         self.age += 1
 
     # This function assumes that step_generation() has already been called since the last call of reproduce()
-    def reproduce(self, num_children):
+    def reproduce(self, num_children, stream=None):
+
+        num_bred_children = self.add_elites(num_children)
+        for child in Species.breed(self.get_potential_parents(), num_bred_children, stream):
+            self.add_offspring(child)
+
+        assert (len(self.genomes) + len(self.misfits)) == num_children
+
+    def get_potential_parents(self):
+
+        num_parents = int(max(2, species_reproduction_elitism * len(self.ancestors)))
+        return self.ancestors[0:num_parents]
+
+    # Starts the next generation with the elites of the species, and returns the number of children left to breed.
+    def add_elites(self, num_children):
 
         self.genomes.clear()
         self.misfits.clear()
 
-        num_parents = int(max(2, species_reproduction_elitism * len(self.ancestors)))
-        potential_parents = self.ancestors[0:num_parents]
+        potential_parents = self.get_potential_parents()
 
         # Elitism, ensuring that at least two children are included from actual reproduction
         num_elites = min(int(species_elitism * num_children), len(potential_parents)) if num_children > 2 else 0
         for i in range(num_elites):
-            if self.is_compatible_with(potential_parents[i]):
-                self.genomes.append(potential_parents[i])
-            else:
-                self.misfits.append(potential_parents[i])
+            self.add_offspring(potential_parents[i])
 
-        for i in range(num_children - num_elites):
-            parent_1 = choice(potential_parents)
-            parent_2 = choice([potential_parent for potential_parent in potential_parents if potential_parent is not parent_1])
+        return num_children - num_elites
 
-            child = Genome.crossover(parent_1, parent_2)
-            child.random_mutation()
+    # Adds a genome to the next generation of the species, or to its misfits if it is not compatible.
+    def add_offspring(self, genome, is_compatible=None):
 
-            if self.is_compatible_with(child):
-                self.genomes.append(child)
-            else:
-                self.misfits.append(child)
+        if is_compatible is None:
+            is_compatible = self.is_compatible_with(genome)
 
-        assert (len(self.genomes) + len(self.misfits)) == num_children
+        if is_compatible:
+            self.genomes.append(genome)
+        else:
+            self.misfits.append(genome)
+
+    # Returns num_children mutated crossovers of random pairs of the potential parents. If a RandomStream is given, the
+    # i-th child of the species is bred with the generator of stream.child(i), so that it does not depend on which other
+    # children are bred, nor where. Children are numbered from first_child_index.
+    @classmethod
+    def breed(cls, potential_parents, num_children, stream=None, first_child_index=0):
+
+        children = []
+        for i in range(first_child_index, first_child_index + num_children):
+            rng = stream.child(i).generator() if stream is not None else random_module
+
+            parent_1 = rng.choice(potential_parents)
+            parent_2 = rng.choice([potential_parent for potential_parent in potential_parents if potential_parent is not parent_1])
+
+            child = Genome.crossover(parent_1, parent_2, rng)
+            child.random_mutation(rng)
+            children.append(child)
+
+        return children
 
     def is_extinct(self):
 
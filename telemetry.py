@@ -0,0 +1,81 @@
+# Counts and times the mutation operators and crossovers carried out by Genomes. Mutation operators are keyed by their
+# names in Genome.mutation_names. An operator is infeasible for a Genome when random_mutation() filters it out before
+# choosing one, such as adding an edge to a Genome to which no edge can be added, and its feasibility time is the time
+# spent finding that out.
+class OperatorCounters:
+
+    def __init__(self):
+
+        self.counts = {}
+        self.infeasible_counts = {}
+        self.times = {}
+        self.feasibility_times = {}
+        self.num_crossovers = 0
+        self.crossover_time = 0
+
+    def as_dict(self):
+
+        return {"counts" : dict(self.counts),
+                "infeasible_counts" : dict(self.infeasible_counts),
+                "times" : dict(self.times),
+                "feasibility_times" : dict(self.feasibility_times),
+                "num_crossovers" : self.num_crossovers,
+                "crossover_time" : self.crossover_time}
+
+# Keeps OperatorCounters for the current generation, which step_generation() starts anew, and for the whole run.
+class OperatorStatistics:
+
+    def __init__(self):
+
+        self.generation = OperatorCounters()
+        self.total = OperatorCounters()
+
+    def record_mutation(self, name, seconds):
+
+        for counters in [self.generation, self.total]:
+            counters.counts[name] = counters.counts.get(name, 0) + 1
+            counters.times[name] = counters.times.get(name, 0) + seconds
+
+    def record_infeasible_mutation(self, name):
+
+        for counters in [self.generation, self.total]:
+            counters.infeasible_counts[name] = counters.infeasible_counts.get(name, 0) + 1
+
+    def record_feasibility_time(self, name, seconds):
+
+        for counters in [self.generation, self.total]:
+            counters.feasibility_times[name] = counters.feasibility_times.get(name, 0) + seconds
+
+    def record_crossover(self, seconds):
+
+        for counters in [self.generation, self.total]:
+            counters.num_crossovers += 1
+            counters.crossover_time += seconds
+
+    # Adds OperatorCounters recorded elsewhere, such as in the worker processes of a ParallelReproducer.
+    def merge(self, other_counters):
+
+        for counters in [self.generation, self.total]:
+            for own_values, other_values in [(counters.counts, other_counters.counts),
+                                             (counters.infeasible_counts, other_counters.infeasible_counts),
+                                             (counters.times, other_counters.times),
+                                             (counters.feasibility_times, other_counters.feasibility_times)]:
+                for name, value in other_values.items():
+                    own_values[name] = own_values.get(name, 0) + value
+            counters.num_crossovers += other_counters.num_crossovers
+            counters.crossover_time += other_counters.crossover_time
+
+    def step_generation(self):
+
+        self.generation = OperatorCounters()
+
+    def reset(self):
+
+        self.generation = OperatorCounters()
+        self.total = OperatorCounters()
+
+    def as_dict(self):
+
+        return {"generation" : self.generation.as_dict(), "total" : self.total.as_dict()}
+
+operator_statistics = OperatorStatistics()
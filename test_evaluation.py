@@ -0,0 +1,51 @@
+import os
+import sys
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+import pytest
+
+from population import *
+import xor
+
+# Evaluators must give every genome the fitness it gets when the networks are evaluated serially, so that seeded runs
+# evolve identically whichever evaluator they use.
+
+async def xor_sigmoid_async(neural_network):
+
+    await asyncio.sleep(0)
+    return xor.test_xor_sigmoid(neural_network)
+
+def run_seeded_population(evaluation_function, evaluator=None):
+
+    population = Population(num_inputs=2, num_outputs=1, output_activation_function=sigmoid, population_size=60, output_stream_name="None", champion_filename=None, seed=9)
+    population.run(evaluation_function, num_generations=6, evaluator=evaluator)
+    population.flush()
+
+    return [(genome.encode(), genome.fitness) for genome in population.genomes], population.champion.encode()
+
+def test_evaluators_match_serial_evaluation():
+
+    serial_run = run_seeded_population(xor.test_xor_sigmoid)
+
+    with ThreadedEvaluator(num_workers=4) as evaluator:
+        assert run_seeded_population(xor.test_xor_sigmoid, evaluator) == serial_run
+
+    with ParallelEvaluator(num_workers=2, chunk_size=8) as evaluator:
+        assert run_seeded_population(xor.test_xor_sigmoid, evaluator) == serial_run
+
+    assert run_seeded_population(xor_sigmoid_async, AsyncEvaluator(max_concurrency=8)) == serial_run
+
+def test_async_evaluator_inside_running_loop():
+
+    neural_networks = [FeedForwardNeuralNetwork(Genome.default(num_inputs=2, num_outputs=1)) for index in range(3)]
+    evaluator = AsyncEvaluator()
+
+    async def evaluate_inside_loop():
+        with pytest.raises(RuntimeError, match="evaluate_concurrently"):
+            evaluator.evaluate(neural_networks, xor_sigmoid_async)
+        return await evaluator.evaluate_concurrently(neural_networks, xor_sigmoid_async)
+
+    assert asyncio.run(evaluate_inside_loop()) == [xor.test_xor_sigmoid(neural_network) for neural_network in neural_networks]
@@ -0,0 +1,46 @@
+import os
+import sys
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+from population import *
+import xor
+
+# Seeded runs must give the same Population whatever else the process has done before them, and whichever way species
+# reproduce.
+
+def run_seeded_population(seed_value, reproducer=None):
+
+    population = Population(num_inputs=2, num_outputs=1, output_activation_function=sigmoid, population_size=60, output_stream_name="None", champion_filename=None, seed=seed_value)
+    population.run(xor.test_xor_sigmoid, num_generations=8, reproducer=reproducer)
+    population.flush()
+
+    return [genome.encode() for genome in population.genomes], population.champion.encode()
+
+def test_same_seed_twice_in_one_process():
+
+    first_run = run_seeded_population(42)
+
+    # Advance the global random number generator and innovation_tracker, as an unrelated run would.
+    seed(1)
+    Population(num_inputs=2, num_outputs=1, population_size=60, output_stream_name="None", champion_filename=None)
+
+    second_run = run_seeded_population(42)
+
+    assert first_run == second_run
+
+def test_seeded_run_leaves_global_numbers_alone():
+
+    state = innovation_tracker.get_state()
+    run_seeded_population(7)
+
+    assert innovation_tracker.get_state() == state
+
+def test_parallel_reproduction_matches_serial():
+
+    with ParallelReproducer(num_workers=2, max_task_size=5) as reproducer:
+        parallel_run = run_seeded_population(3, reproducer)
+
+    assert run_seeded_population(3) == parallel_run
@@ -0,0 +1,66 @@
+import os
+import sys
+
+# For use in contexts where this file is imported from outside this directory.
+file_dir = os.path.dirname(__file__)
+sys.path.append(file_dir)
+
+import population as population_module
+from population import *
+import xor
+
+# The batched assignment of misfits to species must give the same species as comparing genomes one by one.
+
+def run_seeded_species(seed_value, vectorize):
+
+    population_module.vectorize_speciation = vectorize
+    try:
+        population = Population(num_inputs=2, num_outputs=1, output_activation_function=sigmoid, population_size=60, output_stream_name="None", champion_filename=None, seed=seed_value)
+        population.run(xor.test_xor_sigmoid, num_generations=8)
+        population.flush()
+    finally:
+        population_module.vectorize_speciation = vectorize_speciation
+
+    return [(species.identifier, [genome.identifier for genome in species.genomes]) for species in population.species]
+
+# The assignment of Population.set_species when vectorize_speciation is not set.
+def assign_species_sequentially(genomes, representatives):
+
+    representatives = list(representatives)
+    founders = []
+    species_indices = []
+    for index, genome in enumerate(genomes):
+        compatible = [number for number, representative in enumerate(representatives) if Genome.similarity(representative, genome) >= species_similarity_threshold]
+        if len(compatible) == 0:
+            compatible = [len(representatives)]
+            representatives.append(genome)
+            founders.append(index)
+        species_indices.append(compatible[0])
+
+    return species_indices, founders
+
+def mutated_genomes(num_genomes, num_mutations):
+
+    genomes = []
+    for index in range(num_genomes):
+        genome = Genome.default(num_inputs=3, num_outputs=2)
+        for mutation in range(num_mutations):
+            genome.random_mutation()
+        genomes.append(genome)
+
+    return genomes
+
+def test_batched_speciation_matches_sequential_population():
+
+    assert run_seeded_species(5, True) == run_seeded_species(5, False)
+
+def test_batched_speciation_matches_sequential_across_blocks():
+
+    seed(11)
+    genomes = mutated_genomes(120, 6)
+    representatives = genomes[:4]
+    misfits = genomes[4:]
+
+    for block_size in [1, 7, 256]:
+        assert assign_species(misfits, [], block_size) == assign_species_sequentially(misfits, [])
+        assert assign_species(misfits, representatives, block_size) == assign_species_sequentially(misfits, representatives)
@@ -6,6 +6,10 @@ file_dir = os.path.dirname(__file__)
 sys.path.append(file_dir)
 
 from functions import *
+import numpy
+
+xor_batch_inputs  = numpy.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+xor_batch_outputs = numpy.array([0, 1, 1, 0])
 
 def xor(inputs):
 
@@ -44,6 +48,23 @@ def test_xor_sigmoid(neural_network):
 
     return fitness
 
+# Same as test_xor_sigmoid, but evaluates all four samples in one call to activate_batch.
+def test_xor_sigmoid_batch(neural_network):
+
+    network_output = neural_network.activate_batch(xor_batch_inputs)[:, 0]
+    errors = numpy.where(numpy.isnan(network_output), 1, (network_output - xor_batch_outputs) ** 2)
+
+    return 4 - numpy.sum(errors)
+
+# Same as test_xor_sigmoid, for use with a StackedEvaluator over xor_batch_inputs. Returns the fitness of every network
+# from the (num_networks, 4, 1) output array of the whole population.
+def test_xor_sigmoid_stacked(outputs):
+
+    network_outputs = outputs[:, :, 0]
+    errors = numpy.where(numpy.isnan(network_outputs), 1, (network_outputs - xor_batch_outputs) ** 2)
+
+    return 4 - numpy.sum(errors, axis=1)
+
 def test_xor_sigmoid_2(neural_network):
 
     fitnesses = []